@@ -0,0 +1,257 @@
+"""An AgentExecutor that stops when the observations already cover the schema.
+
+After every tool call the executor checks which schema field groups (a
+value and its *_source, see refresh.field_groups) have evidence in the
+observations so far: a keyword for the field near a plausible value, e.g.
+"altitude" near "550 km". It asks for the final answer as soon as enough
+groups have evidence, or once every group without evidence has had
+`give_up_after` targeted searches come back empty. Hitting max_iterations
+also asks for the final answer instead of returning "Agent stopped".
+
+Observations are compacted before they reach the scratchpad (see
+compaction.py), so each ReAct step's prompt stays about the same size.
+"""
+import os
+import re
+import time
+from typing import List
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.exceptions import OutputParserException
+from langchain_core.utils.input import get_color_mapping
+from compaction import ObservationCompactor
+from refresh import field_groups
+from tracing import get_tracer
+
+# "off" falls back to the plain fixed-budget AgentExecutor loop
+ADAPTIVE_AGENT = os.getenv("ADAPTIVE_AGENT", "on")
+# Share of field groups that need evidence before the agent is asked to answer
+AGENT_COMPLETENESS = float(os.getenv("AGENT_COMPLETENESS", 1.0))
+# Targeted searches without evidence after which a field group is given up
+AGENT_GIVE_UP_AFTER = int(os.getenv("AGENT_GIVE_UP_AFTER", 2))
+# "off" passes raw tool output to the agent
+OBSERVATION_COMPACTION = os.getenv("OBSERVATION_COMPACTION", "on")
+
+# Observation appended to the scratchpad when the executor wants the final answer
+FINISH_INSTRUCTION = (
+    "Searching is complete: the observations above cover every field that can be found. "
+    "Do not search again. Now write the Final Answer from these observations, "
+    "using \"Not found\" for the rest."
+)
+
+MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+MONEY = r"(?:\$|us\$|usd|₹|rs\.?|inr|€|eur)\s*\d|\d[\d,.]*\s*(?:million|billion|crore|lakh|mn|bn)\b"
+# Named launch vehicles and launch sites; generic words like "rocket" or "centre" are in every result
+VEHICLES = (
+    r"\b(?:pslv|gslv|lvm3|sslv|falcon ?(?:9|heavy)|ariane ?\d|soyuz|vega(?:-c)?|atlas v|delta (?:ii|iv)|electron"
+    r"|h-?ii[ab]?|h3|long march|chang zheng|proton|antares|minotaur|rokot|dnepr|zenit|angara|kuaizhou|epsilon"
+    r"|new glenn|starship|vulcan|pegasus|lvm-3)\b"
+)
+SITES = (
+    r"\b(?:sriharikota|satish dhawan|kourou|guiana space|baikonur|cape canaveral|kennedy space|vandenberg|plesetsk"
+    r"|vostochny|jiuquan|xichang|taiyuan|wenchang|tanegashima|uchinoura|mahia|wallops|kodiak|semnan|sohae"
+    r"|palmachim|naro space|starbase|s?lc-\d+[a-z]?)\b"
+)
+
+# field: (keywords that mention the field, value pattern that must appear near a keyword).
+# Every field here needs a value near its keyword: words common to any satellite page ("mission",
+# "first", "booster") must not count as evidence, or runs stop before the field was searched.
+FIELD_EVIDENCE = {
+    "altitude": (r"altitude|apogee|perigee|orbit|above (?:the )?earth", r"\d[\d,.]*\s*(?:km|kilomet)"),
+    "orbital_life_years": (r"life|lifetime|lifespan|operational for|years", r"\d+(?:\.\d+)?\s*(?:\+\s*)?years?"),
+    "launch_orbit_classification": (
+        r"orbit",
+        r"\b(?:gto|leo|sso|geo|meo|heo|geostationary|geosynchronous|sun[- ]synchronous|low earth|polar|halo|lagrange)"
+    ),
+    "number_of_payloads": (r"payload|transponder|instrument", r"\d+\s+(?:\w+\s+)?(?:payloads?|transponders?|instruments?)|payloads?\W+\d"),
+    "satellite_type": (
+        r"satellite|spacecraft",
+        r"\b(?:communications?|earth[- ]observation|remote[- ]sensing|navigation|experimental|scientific|science"
+        r"|weather|meteorological|astronomy|technology demonstration)\s+(?:satellite|spacecraft|mission)"
+    ),
+    "satellite_application": (
+        r"application|purpose|objective|used for|designed (?:for|to)|intended",
+        r"(?:used|designed|intended|dedicated) (?:for|to) \w+|(?:purpose|objective|application)s? (?:is|are|include)"
+        r"|\b(?:broadband|internet|broadcasting|telecommunications?|navigation|weather forecasting|disaster management"
+        r"|imaging|mapping|surveillance|reconnaissance|monitoring)\b"
+    ),
+    "sensor_specs": (
+        r"sensor|band|resolution|camera|imager|spectr|payload",
+        r"\d+(?:\.\d+)?\s*(?:m|meters?|metres?|nm|µm|microns?|arcsec|ghz|mhz)\b|\b[xcslkp]u?a?[- ]band"
+    ),
+    "technological_breakthroughs": (
+        r"first|breakthrough|novel|innovat|indigenous|pioneer|new technolog",
+        r"\bfirst\s+(?:\w+\s+){0,3}?(?:satellite|spacecraft|mission|instrument|payload)\s+(?:to|ever|of its kind)\b"
+        r"|breakthrough|novel technolog|innovative|indigenously (?:developed|built)|pioneer(?:ed|ing)|technology demonstrat"
+    ),
+    "launch_cost": (r"launch cost|cost|price|budget", MONEY),
+    "launch_vehicle": (r"launch vehicle|rocket|launched (?:by|on|aboard)|aboard", VEHICLES),
+    "launch_date": (r"launch", r"\b(?:19|20)\d\d-\d\d-\d\d\b|\b\d{1,2}\s+" + MONTHS + r"\s+(?:19|20)\d\d|" + MONTHS + r"\s+\d{1,2},?\s+(?:19|20)\d\d"),
+    "launch_site": (
+        r"launch site|launched from|spaceport|cosmodrome|space cent(?:re|er)|launch complex|pad",
+        SITES
+    ),
+    "launch_mass": (r"mass|weigh", r"\d[\d,.]*\s*(?:kg|kilograms?|tonnes?|tons?|t|lbs?)\b"),
+    "launch_success": (r"launch", r"success|failed|failure|anomaly|placed (?:in|into) (?:its |the )?orbit|reached orbit"),
+    "vehicle_reusability": (
+        r"booster|first stage|launch vehicle|rocket|" + VEHICLES,
+        r"\b(?:reusable|reused|re-used|expendable|refurbished|recovered|flight[- ]proven|landed|landing|not reusable)\b"
+    ),
+    "mission_cost": (r"cost|budget|approved|sanctioned|funding", MONEY),
+}
+
+# Characters around a keyword searched for its value
+EVIDENCE_WINDOW = 200
+
+
+def field_pattern(field):
+    """Keyword and value regexes for a field; fields without a spec match on their own name"""
+    keywords, value = FIELD_EVIDENCE.get(field, (re.escape(field.replace("_", " ")), None))
+    return re.compile(keywords, re.IGNORECASE), re.compile(value, re.IGNORECASE) if value else None
+
+
+def has_evidence(patterns, text):
+    keywords, value = patterns
+    for match in keywords.finditer(text):
+        if value is None:
+            return True
+        window = text[max(0, match.start() - EVIDENCE_WINDOW):match.end() + EVIDENCE_WINDOW]
+        if value.search(window):
+            return True
+    return False
+
+
+class EvidenceTracker:
+    """Which field groups have evidence in the observations, and which were searched for in vain"""
+
+    def __init__(self, fields, give_up_after=AGENT_GIVE_UP_AFTER):
+        self.groups = [group[0] for group in field_groups(fields)]
+        self.patterns = {field: field_pattern(field) for field in self.groups}
+        self.give_up_after = give_up_after
+        self.found = set()
+        self.misses = {field: 0 for field in self.groups}
+
+    def observe(self, query, observation):
+        query, observation = str(query), str(observation)
+        for field in self.groups:
+            if field in self.found:
+                continue
+            if has_evidence(self.patterns[field], observation):
+                self.found.add(field)
+            elif self.patterns[field][0].search(query):
+                self.misses[field] += 1
+
+    @property
+    def exhausted(self):
+        return {field for field in self.groups if field not in self.found and self.misses[field] >= self.give_up_after}
+
+    def stop_reason(self):
+        if len(self.found) == len(self.groups):
+            return "complete"
+        return "gave_up" if len(self.found) + len(self.exhausted) == len(self.groups) else "enough"
+
+    def should_stop(self, completeness=AGENT_COMPLETENESS):
+        if not self.groups:
+            return False
+        if len(self.found) >= completeness * len(self.groups):
+            return True
+        return len(self.found) + len(self.exhausted) == len(self.groups)
+
+
+class AdaptiveAgentExecutor(AgentExecutor):
+    """AgentExecutor whose run ends when the schema is covered rather than after a fixed step count.
+
+    `schema_fields` are the schema keys the agent fills, unless a run's inputs
+    name a narrower set under "schema_fields" (field refreshes); max_iterations
+    stays the upper bound. Per-run state (evidence, passages already shown) lives in
+    `_call`, so one executor can serve concurrent runs.
+    """
+
+    schema_fields: List[str] = []
+    completeness: float = AGENT_COMPLETENESS
+    give_up_after: int = AGENT_GIVE_UP_AFTER
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # RunnableAgent streams the LLM by default, and a streamed call goes to the model's _stream,
+        # bypassing the LLM response cache; plan with invoke so every turn can be served from it
+        if hasattr(self.agent, "stream_runnable"):
+            self.agent.stream_runnable = False
+
+    def _call(self, inputs, run_manager=None):
+        schema_fields = inputs.get("schema_fields") or self.schema_fields
+        adaptive = ADAPTIVE_AGENT != "off" and bool(schema_fields)
+        compacting = OBSERVATION_COMPACTION != "off"
+        if not adaptive and not compacting:
+            return super()._call(inputs, run_manager=run_manager)
+
+        name_to_tool_map = {tool.name: tool for tool in self.tools}
+        color_mapping = get_color_mapping([tool.name for tool in self.tools], excluded_colors=["green", "red"])
+        tracker = EvidenceTracker(schema_fields, self.give_up_after)
+        compactor = ObservationCompactor(tracker.patterns.values()) if compacting else None
+        intermediate_steps = []
+        iterations = 0
+        time_elapsed = 0.0
+        start_time = time.time()
+        stop_reason = "limit"
+        while self._should_continue(iterations, time_elapsed):
+            next_step_output = self._take_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=run_manager
+            )
+            if isinstance(next_step_output, AgentFinish):
+                self._annotate("answered", iterations, tracker, compactor)
+                return self._return(next_step_output, intermediate_steps, run_manager=run_manager)
+            if len(next_step_output) == 1:
+                tool_return = self._get_tool_return(next_step_output[0])
+                if tool_return is not None:
+                    intermediate_steps.extend(next_step_output)
+                    return self._return(tool_return, intermediate_steps, run_manager=run_manager)
+            for action, observation in next_step_output:
+                if action.tool != "_Exception":
+                    # Evidence is judged on the full output, before compaction drops anything
+                    tracker.observe(action.tool_input, observation)
+                    if compactor is not None:
+                        observation = compactor.compact(observation, action.tool_input)
+                intermediate_steps.append((action, observation))
+            if compactor is not None:
+                fitted = compactor.fit_scratchpad([str(observation) for _, observation in intermediate_steps])
+                intermediate_steps = [(action, observation) for (action, _), observation in zip(intermediate_steps, fitted)]
+            iterations += 1
+            time_elapsed = time.time() - start_time
+            if adaptive and tracker.should_stop(self.completeness):
+                stop_reason = tracker.stop_reason()
+                break
+
+        self._annotate(stop_reason, iterations, tracker, compactor)
+        if not adaptive:
+            output = self.agent.return_stopped_response(self.early_stopping_method, intermediate_steps, **inputs)
+        else:
+            output = self._finish(inputs, intermediate_steps, run_manager)
+        return self._return(output, intermediate_steps, run_manager=run_manager)
+
+    def _finish(self, inputs, intermediate_steps, run_manager):
+        """One more LLM turn told to answer from what was gathered, instead of a canned stop message"""
+        steps = intermediate_steps + [(AgentAction(tool="_finish", tool_input="", log=""), FINISH_INSTRUCTION)]
+        try:
+            output = self.agent.plan(steps, callbacks=run_manager.get_child() if run_manager else None, **inputs)
+        except OutputParserException as e:
+            # An answer without the "Final Answer:" prefix is still worth parsing
+            llm_output = getattr(e, "llm_output", None) or ""
+            if "{" in llm_output:
+                return AgentFinish({"output": llm_output}, llm_output)
+            output = None
+        if isinstance(output, AgentFinish):
+            return output
+        return self.agent.return_stopped_response(self.early_stopping_method, intermediate_steps, **inputs)
+
+    def _annotate(self, stop_reason, iterations, tracker, compactor=None):
+        attrs = {
+            "stop_reason": stop_reason,
+            "iterations": iterations,
+            "fields_with_evidence": len(tracker.found),
+            "fields_given_up": len(tracker.exhausted),
+            "field_groups": len(tracker.groups),
+        }
+        if compactor is not None:
+            attrs.update(observation_chars_raw=compactor.raw_chars, observation_chars=compactor.compacted_chars)
+        get_tracer().annotate(**attrs)
@@ -0,0 +1,170 @@
+import argparse
+import re
+import pandas as pd
+from columnar import FLAGS
+from data_manager import SatelliteDataManager
+
+AGGREGATIONS = ["count", "sum", "mean", "median", "min", "max", "nunique"]
+OPERATORS = ["==", "!=", "<=", ">=", "<", ">", "in", "not in", "contains", "between", "isna", "notna"]
+
+# Name of the row-count column; aggregating "count" with no column counts satellites
+ROW_COUNT = "satellites"
+
+
+def coerce(series, value):
+    """Convert a filter value (often a string from the UI or command line) to the column's type"""
+    if isinstance(value, (list, tuple, set)):
+        return [coerce(series, item) for item in value]
+    if not isinstance(value, str):
+        return value
+    if pd.api.types.is_bool_dtype(series.dtype):
+        key = value.strip().lower()
+        if key in ("1", "1.0", "0", "0.0"):
+            return float(key) == 1.0
+        if key not in FLAGS:
+            raise ValueError(f"Expected a yes/no value for {series.name}, got {value!r}")
+        return FLAGS[key]
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return float(value.replace(",", ""))
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return pd.Timestamp(value)
+    return value
+
+
+def condition(table, column, op, value=None):
+    """Boolean mask for one filter; NA values never match except for isna"""
+    if column not in table.columns:
+        raise ValueError(f"Unknown column: {column}")
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown operator: {op}. Choose from {', '.join(OPERATORS)}")
+    series = table[column]
+    if op == "isna":
+        return series.isna()
+    if op == "notna":
+        return series.notna()
+    if op == "contains":
+        mask = series.astype("string").str.contains(str(value), case=False, regex=False)
+    elif op in ("in", "not in"):
+        values = coerce(series, value.split(",") if isinstance(value, str) else value)
+        mask = series.isin(values)
+        if op == "not in":
+            mask = ~mask & series.notna()
+    elif op == "between":
+        low, high = coerce(series, value.split(",") if isinstance(value, str) else value)
+        mask = series.between(low, high)
+    else:
+        value = coerce(series, value)
+        mask = {
+            "==": series.__eq__, "!=": series.__ne__, "<": series.__lt__,
+            "<=": series.__le__, ">": series.__gt__, ">=": series.__ge__,
+        }[op](value)
+    return mask.fillna(False).astype(bool)
+
+
+def parse_filter(text):
+    """Parse "column op value", e.g. "altitude_km > 500" or "launch_vehicle in PSLV,GSLV" """
+    match = re.match(r"^\s*(\w+)\s+(not in|==|!=|<=|>=|<|>|in|contains|between|isna|notna)(?=\s|$)\s*(.*?)\s*$", text)
+    if not match:
+        raise ValueError(f"Cannot parse filter {text!r}; expected 'column operator value'")
+    return match.group(1), match.group(2), match.group(3)
+
+
+def parse_aggregate(text):
+    """Parse "column:func" (e.g. "altitude_km:mean"), or just "count" for the number of satellites"""
+    column, _, func = text.rpartition(":")
+    return column or None, func
+
+
+def aggregate_name(column, func):
+    return ROW_COUNT if column is None else f"{column}_{func}"
+
+
+def query(table, filters=(), group_by=(), aggregates=((None, "count"),), columns=None,
+          sort_by=None, ascending=False, limit=None):
+    """Filter, group and aggregate a fleet table (SatelliteDataManager.get_fleet_table()).
+
+    `filters` are (column, operator, value) tuples, all of which must hold;
+    `aggregates` are (column, function) tuples, with column None counting
+    satellites. Without `group_by` the aggregates cover the whole filtered
+    fleet; with `aggregates` empty the matching rows themselves are returned
+    (only `columns`, if given). Booleans aggregate as numbers, so the mean of
+    launch_success is the success rate.
+    """
+    mask = pd.Series(True, index=table.index)
+    for column, op, value in filters:
+        mask &= condition(table, column, op, value)
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+    aggregates = list(aggregates or [])
+    # The satellite name is the index and is always part of listed rows
+    columns = [column for column in columns or [] if column != "satellite"]
+    for column in group_by + [column for column, _ in aggregates if column] + columns:
+        if column not in table.columns:
+            raise ValueError(f"Unknown column: {column}")
+    for _, func in aggregates:
+        if func not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation: {func}. Choose from {', '.join(AGGREGATIONS)}")
+
+    if not aggregates:
+        result = (table.loc[mask, columns] if columns else table.loc[mask]).reset_index()
+    else:
+        # Only the columns the query touches are sliced out of the fleet table
+        needed = list(dict.fromkeys(group_by + [column for column, _ in aggregates if column]))
+        frame = table.loc[mask, needed]
+        if group_by:
+            grouped = frame.groupby(group_by, dropna=False, observed=True, sort=False)
+            result = pd.DataFrame(index=grouped.size().index)
+            for column, func in aggregates:
+                name = aggregate_name(column, func)
+                if column is None:
+                    result[name] = grouped.size()
+                else:
+                    result[name] = grouped[column].agg(func)
+            result = result.reset_index()
+        else:
+            row = {}
+            for column, func in aggregates:
+                row[aggregate_name(column, func)] = len(frame) if column is None else getattr(frame[column], func)()
+            result = pd.DataFrame([row])
+
+    if sort_by:
+        result = result.sort_values(sort_by, ascending=ascending, na_position="last")
+    if limit:
+        result = result.head(limit)
+    return result.reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query stored satellite data")
+    parser.add_argument("--where", action="append", default=[], help='Filter, e.g. "altitude_km > 500" (repeatable)')
+    parser.add_argument("--group-by", help="Comma-separated columns to group by")
+    parser.add_argument("--agg", action="append", default=[],
+                        help='Aggregate as column:function, e.g. "altitude_km:mean"; "count" counts satellites (repeatable)')
+    parser.add_argument("--columns", help="Comma-separated columns to list when not aggregating")
+    parser.add_argument("--sort", help="Result column to sort by (descending unless --ascending)")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--list-columns", action="store_true", help="Show the available columns and their types")
+    parser.add_argument("--backend", help="Storage backend (default: $SATELLITE_STORAGE_BACKEND or journal)")
+    args = parser.parse_args(argv)
+
+    table = SatelliteDataManager(backend=args.backend).get_fleet_table()
+    if args.list_columns:
+        print(table.dtypes.to_string())
+        return
+    group_by = [column.strip() for column in args.group_by.split(",")] if args.group_by else []
+    aggregates = [parse_aggregate(text) for text in args.agg] or ([(None, "count")] if group_by else [])
+    result = query(
+        table,
+        filters=[parse_filter(text) for text in args.where],
+        group_by=group_by,
+        aggregates=aggregates,
+        columns=[column.strip() for column in args.columns.split(",")] if args.columns else None,
+        sort_by=args.sort,
+        ascending=args.ascending,
+        limit=args.limit,
+    )
+    print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
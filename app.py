@@ -1,53 +1,198 @@
+# The agent stack (LangChain, search clients) is imported only when a gather or
+# refresh action runs, through orchestrator.bot_class; keep it out of the
+# imports below so browsing stored data starts fast (python benchmark.py --import-budget)
 import streamlit as st
 import json
-from basic_info_bot import BasicInfoBot
-from technical_specs_bot import TechnicalSpecsBot
-from launch_cost_bot import LaunchCostBot
 from data_manager import SatelliteDataManager
+from orchestrator import gather_all, gather_unified, bot_class, DATA_TYPE_LABELS
+from refresh import FieldRefresher
+from name_index import SatelliteNameIndex, page
+from exports import EXPORT_FORMATS, export_chunks
+from analytics import query, aggregate_name, AGGREGATIONS, OPERATORS
 import pandas as pd
 import os
-import sys
+import threading
+import time
 from dotenv import load_dotenv
-import serpapi
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the data manager
-data_manager = SatelliteDataManager()
-
-# Set page config
+# Must be the first Streamlit command: the cached getters below show a spinner on a cache miss
 st.set_page_config(
     page_title="Satellite Information System",
     page_icon="🛰️",
     layout="wide"
 )
 
-class CaptureStdout:
-    def __init__(self, container):
-        self.container = container
+@st.cache_resource
+def get_data_manager():
+    """One data manager per server process, shared by all sessions and reruns"""
+    return SatelliteDataManager()
+
+
+@st.cache_resource
+def get_bot(data_type):
+    """Bots keep their LLM client, tools and agent executor, so build each one once"""
+    return bot_class(data_type)(data_manager=get_data_manager())
+
+
+@st.cache_resource
+def get_name_index():
+    """Search index over stored satellite names; rebuilt only when the names change"""
+    return SatelliteNameIndex()
+
+
+data_manager = get_data_manager()
+# Pick up writes from batch runs or other processes since the last rerun
+data_manager.refresh()
+
+# Saved satellites shown per sidebar page; render cost stays constant however large the catalogue
+SIDEBAR_PAGE_SIZE = 20
+
+# Matches listed for a search over stored research results
+RESEARCH_SEARCH_LIMIT = 25
+
+# Rows shown when an analytics query lists satellites instead of aggregating
+ANALYTICS_MAX_ROWS = 1000
+
+# Fields older than this are offered for refresh; unset means only missing fields are
+REFRESH_MAX_AGE_DAYS = float(os.getenv("REFRESH_MAX_AGE_DAYS")) if os.getenv("REFRESH_MAX_AGE_DAYS") else None
+
+class AgentLogView:
+    """Shows the latest lines of an agent's run log, redrawn at most every `min_interval` seconds.
+
+    Streamlit elements can only be updated from the script thread, so events
+    from agents on worker threads just mark the log as changed; the caller's
+    polling loop picks them up with `refresh()`.
+    """
+
+    def __init__(self, container, max_lines=200, min_interval=0.5):
+        from callbacks import StreamingLogHandler
+
         self.placeholder = container.empty()
-        self.output = []
-        
-    def write(self, text):
-        if text:
-            self.output.append(text)
+        self.handler = StreamingLogHandler(max_lines=max_lines, on_update=self.refresh)
+        self.min_interval = min_interval
+        self.rendered_version = 0
+        self.last_render = 0.0
+        self.thread = threading.current_thread()
+
+    def refresh(self, force=False):
+        if threading.current_thread() is not self.thread or self.handler.version == self.rendered_version:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_render < self.min_interval:
+            return
+        self.rendered_version = self.handler.version
+        self.last_render = now
+        try:
+            self.placeholder.code("\n".join(self.handler.lines()), language="text")
+        except Exception as e:
+            print(f"Error updating UI: {e}")
+
+def render_provenance(satellite_name, data_type):
+    """Note which fields were copied from another member of the satellite's constellation"""
+    entry = data_manager.get_satellite_data(satellite_name, data_type) or {}
+    inherited_from = entry.get("inherited_from")
+    if inherited_from:
+        sources = ", ".join(sorted(set(inherited_from.values())))
+        st.caption(
+            f"Inherited from the {entry.get('family')} family, not researched for this satellite "
+            f"(researched for {sources}): {', '.join(inherited_from)}"
+        )
+
+
+def render_refresh_controls(satellite_name, data_type):
+    """Offer to re-research only the missing or stale fields of a stored record"""
+    refresher = FieldRefresher(data_manager, max_age=REFRESH_MAX_AGE_DAYS)
+    stale = refresher.stale_fields(satellite_name, data_type)
+    if not stale:
+        return
+    st.caption(f"Missing or stale fields: {', '.join(stale)}")
+    if st.button("Refresh Missing Fields", key=f"refresh_{data_type}_{satellite_name}"):
+        with st.spinner(f"Researching {len(stale)} fields..."):
             try:
-                self.placeholder.code(''.join(self.output), language="text")
+                merged = refresher.refresh(get_bot(data_type), satellite_name, stale)
             except Exception as e:
-                print(f"Error updating UI: {e}")
-                try:
-                    self.placeholder = self.container.empty()
-                    self.placeholder.code(''.join(self.output), language="text")
-                except:
-                    pass
-        
-    def flush(self):
-        try:
-            if self.output:
-                self.placeholder.code(''.join(self.output), language="text")
-        except:
-            pass
+                merged = None
+                st.error(f"Error: {str(e)}")
+        if merged:
+            st.rerun()
+        else:
+            st.warning("No new values were found.")
+
+def render_fleet_analytics():
+    """Filter, group and aggregate all stored satellites (see analytics.py)"""
+    st.header("Fleet Analytics")
+    table = data_manager.get_fleet_table()
+    if table.empty:
+        st.info("No satellite data stored yet.")
+        return
+    columns = [column for column in table.columns if not column.endswith("_source")]
+    st.caption(f"{len(table)} satellites. Costs are in USD, masses in kg and altitudes in km.")
+
+    st.markdown("**Filters**")
+    filter_rows = st.data_editor(
+        pd.DataFrame({"column": pd.Series(dtype="string"), "operator": pd.Series(dtype="string"),
+                      "value": pd.Series(dtype="string")}),
+        num_rows="dynamic",
+        column_config={
+            "column": st.column_config.SelectboxColumn("Column", options=columns),
+            "operator": st.column_config.SelectboxColumn("Operator", options=OPERATORS),
+            "value": st.column_config.TextColumn("Value", help="Comma-separated for 'in' and 'between'"),
+        },
+        use_container_width=True,
+        key="analytics_filters"
+    )
+    group_by = st.multiselect("Group by", columns, key="analytics_group_by")
+    st.markdown("**Aggregates** (leave the column empty to count satellites)")
+    aggregate_rows = st.data_editor(
+        pd.DataFrame({"column": pd.Series([None], dtype="string"), "function": pd.Series(["count"], dtype="string")}),
+        num_rows="dynamic",
+        column_config={
+            "column": st.column_config.SelectboxColumn("Column", options=columns),
+            "function": st.column_config.SelectboxColumn("Function", options=AGGREGATIONS),
+        },
+        use_container_width=True,
+        key="analytics_aggregates"
+    )
+
+    filters = [
+        (row["column"], row["operator"], "" if pd.isna(row["value"]) else row["value"])
+        for _, row in filter_rows.iterrows()
+        if not pd.isna(row["column"]) and not pd.isna(row["operator"])
+    ]
+    aggregates = [
+        (None if pd.isna(row["column"]) else row["column"], row["function"])
+        for _, row in aggregate_rows.iterrows()
+        if not pd.isna(row["function"])
+    ]
+    try:
+        started = time.perf_counter()
+        result = query(
+            table, filters, group_by, aggregates,
+            sort_by=aggregate_name(*aggregates[0]) if group_by and aggregates else None,
+            limit=None if aggregates else ANALYTICS_MAX_ROWS
+        )
+        elapsed = time.perf_counter() - started
+    except (ValueError, TypeError) as e:
+        st.error(f"Query failed: {str(e)}")
+        return
+
+    st.caption(f"{len(result)} rows in {elapsed * 1000:.0f} ms")
+    st.dataframe(result, use_container_width=True, hide_index=True)
+    value_columns = [column for column in result.columns if column not in group_by]
+    if (len(group_by) == 1 and len(value_columns) == 1 and 1 < len(result) <= 100
+            and pd.api.types.is_numeric_dtype(result[value_columns[0]])):
+        chart = result.dropna(subset=group_by).set_index(group_by[0])[value_columns]
+        st.bar_chart(chart.astype("float64"))
+    st.download_button(
+        label="Download CSV",
+        data=result.to_csv(index=False),
+        file_name="satellite_analytics.csv",
+        mime="text/csv",
+        key="analytics_download"
+    )
 
 # Title and description
 st.title("🛰️ Satellite Information System")
@@ -61,6 +206,7 @@ Each agent focuses on different aspects of satellite information:
 
 # Sidebar for satellite selection
 st.sidebar.title("Satellite Selection")
+view = st.sidebar.radio("View", ["Satellite details", "Fleet analytics"], horizontal=True, key="view")
 
 # Use session state to manage the current satellite name
 if 'satellite_name' not in st.session_state:
@@ -77,11 +223,36 @@ if satellite_name_input != st.session_state.satellite_name:
     st.session_state.satellite_name = satellite_name_input
     st.rerun()
 
-# Display existing satellites with delete option
+def reset_satellite_page():
+    st.session_state.satellite_page = 1
+
+# Display existing satellites with delete option, one page at a time
 existing_satellites = data_manager.get_all_satellites()
 if existing_satellites:
+    name_index = get_name_index()
+    name_index.update(existing_satellites)
     st.sidebar.markdown("### Previously Searched Satellites")
-    for sat in existing_satellites:
+    search_query = st.sidebar.text_input(
+        "Search saved satellites",
+        placeholder="e.g. starlink 12 or gsat",
+        key="satellite_search",
+        on_change=reset_satellite_page
+    )
+    group_sizes = name_index.group_sizes()
+    group = None
+    if len(group_sizes) > 1:
+        group = st.sidebar.selectbox(
+            "Constellation",
+            [None] + list(group_sizes),
+            format_func=lambda g: f"All ({len(existing_satellites)})" if g is None else f"{g} ({group_sizes[g]})",
+            key="satellite_group",
+            on_change=reset_satellite_page
+        )
+    matches = name_index.search(search_query, group)
+    page_number = st.sidebar.number_input("Page", min_value=1, step=1, key="satellite_page")
+    visible, pages = page(matches, page_number, SIDEBAR_PAGE_SIZE)
+    st.sidebar.caption(f"{len(matches)} satellites, page {min(page_number, pages)} of {pages}")
+    for sat in visible:
         col1, col2 = st.sidebar.columns([4, 1])
         with col1:
             if st.button(sat, key=f"select_sat_{sat}"):
@@ -94,23 +265,130 @@ if existing_satellites:
                     st.session_state.satellite_name = ""
                 st.rerun()
 
-# Add download button for the entire satellite_data.json file
-file_path = "satellite_data.json"
-if os.path.exists(file_path):
-    with open(file_path, "r") as f:
-        all_satellite_data = f.read()
-    st.sidebar.download_button(
-        label="Download All Satellite Data (JSON)",
-        data=all_satellite_data,
-        file_name="satellite_data.json",
-        mime="application/json"
-    )
+# Full-text search over stored research results (field values and source URLs)
+if existing_satellites:
+    with st.sidebar.expander("Search Research Results"):
+        research_query = st.text_input(
+            "Search text and sources",
+            placeholder="e.g. SAR or source:skyrocket.de",
+            key="research_query"
+        )
+        if research_query:
+            hits = data_manager.search_records(research_query, limit=RESEARCH_SEARCH_LIMIT)
+            if not hits:
+                st.caption("No matches.")
+            for sat, fields in hits:
+                if st.button(sat, key=f"research_hit_{sat}", help=f"Matched in: {', '.join(fields)}"):
+                    st.session_state.satellite_name = sat
+                    st.rerun()
+            if len(hits) == RESEARCH_SEARCH_LIMIT:
+                st.caption(f"Showing the first {RESEARCH_SEARCH_LIMIT} matches; add terms to narrow the search.")
+
+# Export the database on demand; nothing is read or serialized until "Prepare export" is clicked
+if existing_satellites:
+    with st.sidebar.expander("Export Satellite Data"):
+        export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+        export_types = st.multiselect(
+            "Data types",
+            list(DATA_TYPE_LABELS),
+            default=list(DATA_TYPE_LABELS),
+            format_func=DATA_TYPE_LABELS.get,
+            key="export_types"
+        )
+        export_since = st.date_input("Updated since", value=None, key="export_since")
+        if not export_types:
+            # An empty selection would otherwise mean "no filter" and export every data type
+            st.caption("Select at least one data type to export.")
+            st.session_state.pop("export_file", None)
+        if st.button("Prepare export", key="prepare_export", disabled=not export_types):
+            st.session_state.pop("export_file", None)
+            try:
+                with st.spinner("Exporting..."):
+                    # st.download_button serves its data from memory, so build the bytes there
+                    # instead of in a temporary file that would outlive the download
+                    data = b"".join(export_chunks(data_manager, export_format, export_types, export_since))
+                st.session_state.export_file = {"data": data, "format": export_format}
+            except Exception as e:
+                st.error(f"Export failed: {str(e)}")
+        export_file = st.session_state.get("export_file")
+        if export_file:
+            file_format = EXPORT_FORMATS[export_file["format"]]
+            st.download_button(
+                label=f"Download {export_file['format'].upper()}",
+                data=export_file["data"],
+                file_name=f"satellite_data.{file_format['extension']}",
+                mime=file_format["mime"]
+            )
 
 # Main content area
-if st.session_state.satellite_name:
+if view == "Fleet analytics":
+    render_fleet_analytics()
+elif st.session_state.satellite_name:
     satellite_name = st.session_state.satellite_name
     st.header(f"Information for {satellite_name}")
     
+    missing_data_types = [
+        data_type for data_type in DATA_TYPE_LABELS
+        if not data_manager.get_satellite_data(satellite_name, data_type)
+    ]
+    if missing_data_types:
+        research_mode = st.radio(
+            "Research mode",
+            ["Parallel agents", "Single unified agent"],
+            horizontal=True,
+            help="The unified agent searches once and fills all categories from shared results, "
+                 "using far fewer search and LLM calls.",
+            key=f"research_mode_{satellite_name}"
+        )
+        if research_mode == "Single unified agent":
+            if st.button("Gather All Missing Information (unified)", key=f"gather_unified_{satellite_name}"):
+                log_container = st.expander("Agent Execution Log", expanded=True)
+                log_view = AgentLogView(log_container)
+                with st.spinner("Researching all categories in one pass..."):
+                    try:
+                        results = gather_unified(
+                            satellite_name, data_manager, missing_data_types, callbacks=[log_view.handler],
+                            bot=get_bot("unified")
+                        )
+                        if results:
+                            st.success("Information gathered successfully!")
+                        else:
+                            st.error("Failed to gather information.")
+                    except Exception as e:
+                        st.error(f"Error: {str(e)}")
+                    finally:
+                        log_view.refresh(force=True)
+        elif st.button("Gather All Missing Information (parallel)", key=f"gather_all_{satellite_name}"):
+            progress_container = st.container()
+            progress_container.markdown("#### Agent Progress:")
+            agent_status = {data_type: progress_container.empty() for data_type in missing_data_types}
+            for data_type, placeholder in agent_status.items():
+                placeholder.info(f"{DATA_TYPE_LABELS[data_type]}: starting...")
+            log_views = {
+                data_type: AgentLogView(progress_container.expander(f"{DATA_TYPE_LABELS[data_type]} log"))
+                for data_type in missing_data_types
+            }
+
+            def show_progress(data_type, state, elapsed, result):
+                label = DATA_TYPE_LABELS[data_type]
+                log_views[data_type].refresh(force=state != "running")
+                if state == "running":
+                    agent_status[data_type].info(f"{label}: running ({elapsed:.0f}s)")
+                elif state == "done":
+                    agent_status[data_type].success(f"{label}: finished in {elapsed:.0f}s")
+                else:
+                    agent_status[data_type].error(f"{label}: failed after {elapsed:.0f}s")
+
+            with st.spinner("Running agents in parallel..."):
+                try:
+                    gather_all(
+                        satellite_name, data_manager, missing_data_types, on_progress=show_progress,
+                        log_handlers={data_type: view.handler for data_type, view in log_views.items()},
+                        bots={data_type: get_bot(data_type) for data_type in missing_data_types}
+                    )
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+    
     # Create tabs for different information categories
     tab1, tab2, tab3, tab4 = st.tabs(["Basic Information", "Technical Specifications", "Launch & Cost", "Raw JSON"])
     
@@ -126,22 +404,22 @@ if st.session_state.satellite_name:
             df = pd.DataFrame([data]).T
             df.columns = ['Value']
             st.dataframe(df, use_container_width=True)
+            render_provenance(satellite_name, "basic_info")
+            render_refresh_controls(satellite_name, "basic_info")
         else:
             if st.button("Gather Basic Information", key=f"gather_basic_{satellite_name}"):
                 with st.spinner("Gathering basic information..."):
                     try:
-                        basic_bot = BasicInfoBot()
+                        basic_bot = get_bot("basic_info")
                         with st.chat_message("assistant"):
                             terminal_container = st.container()
                             terminal_container.markdown("#### Agent Execution Log:")
                             status = terminal_container.empty()
                             status.info("Agent starting...")
-                            stdout_capture = CaptureStdout(terminal_container)
-                            old_stdout = sys.stdout
-                            sys.stdout = stdout_capture
-                            
+                            log_view = AgentLogView(terminal_container)
+
                             try:
-                                result = basic_bot.process_satellite(satellite_name)
+                                result = basic_bot.process_satellite(satellite_name, callbacks=[log_view.handler])
                                 status.success("Agent finished.")
                                 if result:
                                     st.success("Basic information gathered successfully!")
@@ -154,7 +432,7 @@ if st.session_state.satellite_name:
                                 status.error(f"Agent failed: {e}")
                                 st.error(f"Error: {str(e)}")
                             finally:
-                                sys.stdout = old_stdout
+                                log_view.refresh(force=True)
                     except Exception as e:
                         st.error(f"Failed to initialize BasicInfoBot: {str(e)}")
     
@@ -167,22 +445,22 @@ if st.session_state.satellite_name:
             df = pd.DataFrame([data]).T
             df.columns = ['Value']
             st.dataframe(df, use_container_width=True)
+            render_provenance(satellite_name, "technical_specs")
+            render_refresh_controls(satellite_name, "technical_specs")
         else:
             if st.button("Gather Technical Specifications", key=f"gather_tech_{satellite_name}"):
                 with st.spinner("Gathering technical specifications..."):
                     try:
-                        tech_bot = TechnicalSpecsBot()
+                        tech_bot = get_bot("technical_specs")
                         with st.chat_message("assistant"):
                             terminal_container = st.container()
                             terminal_container.markdown("#### Agent Execution Log:")
                             status = terminal_container.empty()
                             status.info("Agent starting...")
-                            stdout_capture = CaptureStdout(terminal_container)
-                            old_stdout = sys.stdout
-                            sys.stdout = stdout_capture
-                            
+                            log_view = AgentLogView(terminal_container)
+
                             try:
-                                result = tech_bot.process_satellite(satellite_name)
+                                result = tech_bot.process_satellite(satellite_name, callbacks=[log_view.handler])
                                 status.success("Agent finished.")
                                 if result:
                                     st.success("Technical specifications gathered successfully!")
@@ -195,7 +473,7 @@ if st.session_state.satellite_name:
                                 status.error(f"Agent failed: {e}")
                                 st.error(f"Error: {str(e)}")
                             finally:
-                                sys.stdout = old_stdout
+                                log_view.refresh(force=True)
                     except Exception as e:
                         st.error(f"Failed to initialize TechnicalSpecsBot: {str(e)}")
     
@@ -208,22 +486,22 @@ if st.session_state.satellite_name:
             df = pd.DataFrame([data]).T
             df.columns = ['Value']
             st.dataframe(df, use_container_width=True)
+            render_provenance(satellite_name, "launch_cost_info")
+            render_refresh_controls(satellite_name, "launch_cost_info")
         else:
             if st.button("Gather Launch and Cost Information", key=f"gather_launch_{satellite_name}"):
                 with st.spinner("Gathering launch and cost information..."):
                     try:
-                        launch_bot = LaunchCostBot()
+                        launch_bot = get_bot("launch_cost_info")
                         with st.chat_message("assistant"):
                             terminal_container = st.container()
                             terminal_container.markdown("#### Agent Execution Log:")
                             status = terminal_container.empty()
                             status.info("Agent starting...")
-                            stdout_capture = CaptureStdout(terminal_container)
-                            old_stdout = sys.stdout
-                            sys.stdout = stdout_capture
-                            
+                            log_view = AgentLogView(terminal_container)
+
                             try:
-                                result = launch_bot.process_satellite(satellite_name)
+                                result = launch_bot.process_satellite(satellite_name, callbacks=[log_view.handler])
                                 status.success("Agent finished.")
                                 if result:
                                     st.success("Launch and cost information gathered successfully!")
@@ -236,7 +514,7 @@ if st.session_state.satellite_name:
                                 status.error(f"Agent failed: {e}")
                                 st.error(f"Error: {str(e)}")
                             finally:
-                                sys.stdout = old_stdout
+                                log_view.refresh(force=True)
                     except Exception as e:
                         st.error(f"Failed to initialize LaunchCostBot: {str(e)}")
     
@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from data_manager import SatelliteDataManager
+from orchestrator import BOT_CLASSES, bot_class
+from scheduler import get_scheduler, BATCH
+from refresh import FieldRefresher
+from tracing import percentile
+
+
+class Checkpoint:
+    """JSONL log of finished (satellite, data_type) units so interrupted runs can resume"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn line from an interrupted run
+                    if record.get("status") == "done":
+                        self.done.add((record["satellite"], record["data_type"]))
+
+    def record(self, satellite_name, data_type, status, timings):
+        line = json.dumps({
+            "satellite": satellite_name,
+            "data_type": data_type,
+            "status": status,
+            "timings": timings,
+        })
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+            if status == "done":
+                self.done.add((satellite_name, data_type))
+
+
+class BatchRunner:
+    """Runs process_satellite for many satellites on a bounded worker pool"""
+
+    def __init__(self, data_manager, data_types, workers=4, checkpoint_path="batch_checkpoint.jsonl",
+                 skip_existing=False, unified=False, refresher=None):
+        self.data_manager = data_manager
+        self.data_types = data_types
+        self.unified = unified
+        self.refresher = refresher
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.skip_existing = skip_existing
+        self.stage_timings = defaultdict(list)
+        self.failures = 0
+        # Units not run because their data was already stored (--skip-existing) or fresh (--refresh)
+        self.skipped = set()
+        self._bots = {}
+        self._lock = threading.Lock()
+
+    def _get_bot(self, data_type):
+        # One bot per data type, shared by the workers like the UI's cached bots:
+        # the agent executor is built once and keeps per-run state in the run's inputs
+        with self._lock:
+            if data_type not in self._bots:
+                bot = bot_class(data_type)(data_manager=self.data_manager)
+                bot.get_agent_executor()
+                self._bots[data_type] = bot
+            return self._bots[data_type]
+
+    def pending_units(self, satellite_names):
+        """Yield (satellite_name, data_types) units: one per data type, or one per satellite when unified"""
+        for satellite_name in satellite_names:
+            needed = []
+            for data_type in self.data_types:
+                if (satellite_name, data_type) in self.checkpoint.done:
+                    continue
+                if self.refresher:
+                    if not self.refresher.stale_fields(satellite_name, data_type):
+                        self.skipped.add((satellite_name, data_type))
+                        continue
+                elif self.skip_existing and self.data_manager.get_satellite_data(satellite_name, data_type):
+                    self.skipped.add((satellite_name, data_type))
+                    continue
+                needed.append(data_type)
+            if self.unified:
+                if needed:
+                    yield satellite_name, tuple(needed)
+            else:
+                for data_type in needed:
+                    yield satellite_name, (data_type,)
+
+    def run_unit(self, satellite_name, data_types):
+        timings = {}
+        start = time.monotonic()
+        # Batch work yields provider quota to interactive UI requests
+        with get_scheduler().priority(BATCH):
+            if self.refresher:
+                stage = f"refresh:{data_types[0]}"
+                merged = self.refresher.refresh(self._get_bot(data_types[0]), satellite_name)
+                results = {data_types[0]: merged} if merged else {}
+            elif self.unified:
+                stage = "agent:unified"
+                results = self._get_bot("unified").process_satellite(
+                    satellite_name, save=False, data_types=list(data_types)
+                ) or {}
+            else:
+                stage = f"agent:{data_types[0]}"
+                result = self._get_bot(data_types[0]).process_satellite(satellite_name, save=False)
+                results = {data_types[0]: result} if result else {}
+        timings[stage] = time.monotonic() - start
+
+        # Refreshes merge into the stored record themselves
+        if results and not self.refresher:
+            start = time.monotonic()
+            self.data_manager.append_many_satellite_data(
+                (satellite_name, data_type, data) for data_type, data in results.items()
+            )
+            timings["storage_write"] = time.monotonic() - start
+
+        failed = 0
+        for data_type in data_types:
+            status = "done" if data_type in results else "failed"
+            failed += status == "failed"
+            self.checkpoint.record(satellite_name, data_type, status, timings)
+        with self._lock:
+            for stage, seconds in timings.items():
+                self.stage_timings[stage].append(seconds)
+            self.failures += failed
+
+    def run(self, satellite_names, progress_every=10):
+        units = self.pending_units(satellite_names)
+        completed = 0
+        started = time.monotonic()
+        satellites_done = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            in_flight = {}
+
+            def submit_next():
+                unit = next(units, None)
+                if unit is not None:
+                    in_flight[pool.submit(self.run_unit, *unit)] = unit
+                return unit is not None
+
+            # Keep at most 2x workers units queued so huge name lists are never materialized
+            while len(in_flight) < self.workers * 2 and submit_next():
+                pass
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    satellite_name, data_types = in_flight.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error processing {', '.join(data_types)} for {satellite_name}: {str(e)}")
+                        with self._lock:
+                            self.failures += len(data_types)
+                    completed += 1
+                    if all((satellite_name, dt) in self.checkpoint.done or (satellite_name, dt) in self.skipped
+                           for dt in self.data_types):
+                        satellites_done.add(satellite_name)
+                    if completed % progress_every == 0:
+                        self.print_progress(completed, len(satellites_done), started)
+                    submit_next()
+
+        return self.report(completed, len(satellites_done), time.monotonic() - started)
+
+    def print_progress(self, completed, satellites_done, started):
+        minutes = (time.monotonic() - started) / 60
+        rate = satellites_done / minutes if minutes else 0.0
+        print(f"[batch] {completed} units finished, {len(self.skipped)} skipped, {satellites_done} satellites complete, "
+              f"{rate:.2f} satellites/minute")
+
+    def report(self, completed, satellites_done, elapsed):
+        minutes = elapsed / 60
+        return {
+            "units_completed": completed,
+            "units_failed": self.failures,
+            "units_skipped": len(self.skipped),
+            "satellites_completed": satellites_done,
+            "elapsed_seconds": elapsed,
+            "satellites_per_minute": satellites_done / minutes if minutes else 0.0,
+            "stages": {
+                stage: {
+                    "count": len(values),
+                    "mean": sum(values) / len(values),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                }
+                for stage, values in self.stage_timings.items()
+            },
+        }
+
+
+def read_satellite_names(names, file_path):
+    if names:
+        yield from names
+    if file_path:
+        with open(file_path, 'r') as f:
+            for line in f:
+                name = line.strip()
+                if name and not name.startswith("#"):
+                    yield name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Research many satellites without the Streamlit UI")
+    parser.add_argument("satellites", nargs="*", help="Satellite names")
+    parser.add_argument("-f", "--file", help="File with one satellite name per line")
+    parser.add_argument("--bots", default=",".join(BOT_CLASSES),
+                        help=f"Comma-separated data types to gather (default: {','.join(BOT_CLASSES)})")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Concurrent agent runs")
+    parser.add_argument("--checkpoint",
+                        help="Progress log used to resume interrupted runs "
+                             "(default: batch_checkpoint.jsonl, or batch_refresh_checkpoint.jsonl with --refresh)")
+    parser.add_argument("--unified", action="store_true",
+                        help="Research all selected data types with one shared agent per satellite")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Only re-research fields that are missing or older than --max-age-days")
+    parser.add_argument("--max-age-days", type=float,
+                        help="With --refresh, also refresh fields last updated longer ago than this")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Skip satellites that already have stored data for a data type")
+    parser.add_argument("--backend", choices=["json", "journal", "sqlite"],
+                        help="Storage backend (default: $SATELLITE_STORAGE_BACKEND or journal)")
+    args = parser.parse_args(argv)
+
+    data_types = [data_type.strip() for data_type in args.bots.split(",") if data_type.strip()]
+    unknown = [data_type for data_type in data_types if data_type not in BOT_CLASSES]
+    if unknown:
+        parser.error(f"Unknown data types: {', '.join(unknown)}")
+    if not args.satellites and not args.file:
+        parser.error("Give satellite names or --file")
+    if args.refresh and args.unified:
+        parser.error("--refresh works per data type and cannot be combined with --unified")
+    checkpoint = args.checkpoint or ("batch_refresh_checkpoint.jsonl" if args.refresh else "batch_checkpoint.jsonl")
+
+    data_manager = SatelliteDataManager(backend=args.backend)
+    refresher = FieldRefresher(data_manager, max_age=args.max_age_days) if args.refresh else None
+    runner = BatchRunner(data_manager, data_types, workers=args.workers,
+                         checkpoint_path=checkpoint, skip_existing=args.skip_existing,
+                         unified=args.unified, refresher=refresher)
+    try:
+        report = runner.run(read_satellite_names(args.satellites, args.file))
+    finally:
+        data_manager.save_data()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+"""Offline benchmark for the research agents and the storage backends.
+
+Gemini and the search providers are replaced by stand-ins driven by the
+recorded responses in benchmark_fixtures.json, with configurable injected
+latency, so runs are repeatable and cost nothing:
+
+    python benchmark.py --sizes 10,1000,100000 --runs 5 --llm-latency 0.5 --search-latency 0.8
+
+For every dataset size and storage backend the store is seeded with that many
+satellites, then a few new satellites are researched end to end by all three
+bots. The report gives per-agent wall time, ReAct iterations (LLM calls) per
+run, how answers were parsed (strict, repaired, reformatted by the LLM, or
+failed; see output_parsing.py) and the cost of a storage write. Each agent
+then researches its first satellite again; that repeat must be served from
+the LLM cache without a single model call, and every model call that
+missed the cache must have gone through the scheduler, or the benchmark
+exits with 1.
+
+`python benchmark.py --import-budget 1.0` instead checks that a cold first
+run of app.py (through Streamlit's AppTest) stays within the budget, raises
+nothing and does not load the agent stack.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Any
+from unittest import mock
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+import basic_info_bot
+import technical_specs_bot
+import launch_cost_bot
+import llm_cache
+import scheduler
+import search_cache
+import single_flight
+import tracing
+from data_manager import SatelliteDataManager
+from adaptive_executor import FINISH_INSTRUCTION
+from clients import ScheduledChatModel
+from output_parsing import parse_stats
+from tracing import percentile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_PATH = os.path.join(REPO_DIR, "benchmark_fixtures.json")
+
+BOT_MODULES = {
+    "basic_info": (basic_info_bot, basic_info_bot.BasicInfoBot),
+    "technical_specs": (technical_specs_bot, technical_specs_bot.TechnicalSpecsBot),
+    "launch_cost_info": (launch_cost_bot, launch_cost_bot.LaunchCostBot),
+}
+
+# Phrases from each bot's prompt template that identify which agent is calling
+PROMPT_MARKERS = {
+    "basic information researcher": "basic_info",
+    "technical specifications researcher": "technical_specs",
+    "launch and cost information researcher": "launch_cost_info",
+}
+
+# Phrase from output_parsing.REFORMAT_PROMPT; such calls get the quoted answer reformatted
+REFORMAT_MARKER = "reformatting task only"
+
+
+def fill_template(value, satellite_name):
+    slug = re.sub(r"[^a-z0-9]+", "-", satellite_name.lower()).strip("-")
+    text = json.dumps(value).replace("{satellite_slug}", slug).replace("{satellite}", satellite_name)
+    return json.loads(text)
+
+
+class Fixtures:
+    def __init__(self, path=FIXTURES_PATH):
+        with open(path, 'r') as f:
+            fixtures = json.load(f)
+        self.search_results = fixtures["search_results"]
+        self.answers = fixtures["answers"]
+        self.search_steps = fixtures["search_steps"]
+
+    def results_for(self, query):
+        # Recorded results are keyed on the satellite; the first word-with-digits or
+        # capitalized token of the query stands in for it
+        match = re.search(r"[A-Z][A-Z0-9-]*\d[A-Z0-9-]*|[A-Z][A-Za-z0-9-]+", query)
+        return fill_template(self.search_results, match.group(0) if match else query)
+
+
+class StubResponder:
+    """Scripted ReAct turns: a fixed number of searches, then the recorded final answer"""
+
+    def __init__(self, fixtures, parse_failure_rate=0.0, seed=0):
+        self.fixtures = fixtures
+        self.parse_failure_rate = parse_failure_rate
+        self.random = random.Random(seed)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def identify(self, prompt):
+        lowered = prompt.lower()
+        for marker, data_type in PROMPT_MARKERS.items():
+            if marker in lowered:
+                return data_type
+        return "basic_info"
+
+    def reformat(self, prompt):
+        """Reformat the raw answer quoted in the prompt, keeping only the values it states.
+
+        Like the real reformat call, it cannot invent anything: keys whose
+        string or number value is not in the text become "Not found".
+        """
+        data_type = max(
+            self.fixtures.answers,
+            key=lambda dtype: sum(f'"{key}"' in prompt for key in self.fixtures.answers[dtype])
+        )
+        text = prompt.rsplit("Text:", 1)[-1]
+        with self._lock:
+            self.calls["reformat"] += 1
+        answer = {}
+        for key in self.fixtures.answers[data_type]:
+            match = re.search(rf'"{re.escape(key)}"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?)', text)
+            answer[key] = json.loads(match.group(1)) if match else "Not found"
+        return f"```json\n{json.dumps(answer, indent=2)}\n```"
+
+    def respond(self, prompt):
+        if REFORMAT_MARKER in prompt:
+            return self.reformat(prompt)
+        data_type = self.identify(prompt)
+        question = prompt.rsplit("Question:", 1)[-1]
+        match = re.search(r"(?:about|for) (.+)", question)
+        satellite_name = match.group(1).strip() if match else "UNKNOWN"
+        steps_done = question.count("Observation:")
+        # The adaptive executor asks for the answer once the observations cover the schema
+        finishing = FINISH_INSTRUCTION in question
+        with self._lock:
+            self.calls[data_type] += 1
+            corrupt = self.random.random() < self.parse_failure_rate
+
+        if steps_done < self.fixtures.search_steps[data_type] and not finishing:
+            fields = list(self.fixtures.answers[data_type])
+            field = fields[(steps_done * 2) % len(fields)].replace("_", " ")
+            return (
+                f"Thought: I need the {field} of {satellite_name}.\n"
+                f"Action: multi_search\n"
+                f"Action Input: {satellite_name} {field}"
+            )
+
+        answer = json.dumps(fill_template(self.fixtures.answers[data_type], satellite_name), indent=2)
+        if corrupt:
+            # Truncated output, as when the model runs out of tokens mid-answer
+            answer = answer[:len(answer) // 2]
+            return f"Thought: I now know the final answer\nFinal Answer: ```json\n{answer}"
+        return f"Thought: I now know the final answer\nFinal Answer: ```json\n{answer}\n```"
+
+
+class StubChatModel(ScheduledChatModel, BaseChatModel):
+    """Stand-in for ChatGoogleGenerativeAI that replays StubResponder turns.
+
+    Uses the production scheduling mixin and, like the Gemini model,
+    implements both _generate and _stream, so calls take the same cache and
+    scheduler path whichever one LangChain picks.
+    """
+
+    responder: Any
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "benchmark-stub"
+
+    def _respond(self, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder.respond("\n".join(str(message.content) for message in messages))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = self._respond(messages)
+        for start in range(0, len(text), 64):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text[start:start + 64]))
+
+
+class StubSearchAPI:
+    """Shared behaviour of the search stand-ins: recorded results after a delay"""
+
+    def __init__(self, fixtures, latency):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _results(self, query):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.fixtures.results_for(query)
+
+    def tavily(self, query, max_results=5):
+        return [{"url": r["url"], "content": r["content"]} for r in self._results(query)[:max_results]]
+
+    def serpapi(self, query):
+        return {"organic_results": [
+            {"link": r["url"], "title": r["title"], "snippet": r["content"]} for r in self._results(query)
+        ]}
+
+    def duckduckgo(self, query, max_results=5):
+        return [
+            {"link": r["url"], "title": r["title"], "snippet": r["content"]}
+            for r in self._results(query)[:max_results]
+        ]
+
+
+def make_search_stubs(api):
+    """Classes matching the constructor and call surface the bots use"""
+
+    class TavilyWrapper:
+        def results(self, query, max_results=5, **kwargs):
+            return api.tavily(query, max_results)
+
+    class StubTavilySearchResults:
+        name = "tavily_search_results_json"
+        description = "A search engine optimized for comprehensive, accurate, and trusted results."
+        max_results = 5
+
+        def __init__(self, **kwargs):
+            self.api_wrapper = TavilyWrapper()
+
+        def run(self, query, **kwargs):
+            return self.api_wrapper.results(query, self.max_results)
+
+    class StubSerpAPIWrapper:
+        def __init__(self, **kwargs):
+            pass
+
+        def results(self, query):
+            return api.serpapi(query)
+
+        def run(self, query):
+            return " ".join(r["snippet"] for r in api.serpapi(query)["organic_results"])
+
+    class StubDuckDuckGoSearchAPIWrapper:
+        def __init__(self, **kwargs):
+            pass
+
+        def results(self, query, max_results=5, **kwargs):
+            return api.duckduckgo(query, max_results)
+
+        def run(self, query):
+            return " ".join(r["snippet"] for r in api.duckduckgo(query))
+
+    class StubDuckDuckGoSearchRun:
+        def __init__(self, **kwargs):
+            self.api_wrapper = StubDuckDuckGoSearchAPIWrapper()
+
+        def run(self, query, **kwargs):
+            return self.api_wrapper.run(query)
+
+    return {
+        "TavilySearchResults": StubTavilySearchResults,
+        "SerpAPIWrapper": StubSerpAPIWrapper,
+        "DuckDuckGoSearchAPIWrapper": StubDuckDuckGoSearchAPIWrapper,
+        "DuckDuckGoSearchRun": StubDuckDuckGoSearchRun,
+    }
+
+
+class OfflineEnvironment:
+    """Patches the bot modules so every LLM and search call hits the stand-ins"""
+
+    def __init__(self, workdir, llm_latency=0.0, search_latency=0.0, parse_failure_rate=0.0, seed=0):
+        self.workdir = workdir
+        self.fixtures = Fixtures()
+        self.responder = StubResponder(self.fixtures, parse_failure_rate, seed)
+        self.search_api = StubSearchAPI(self.fixtures, search_latency)
+        self.llm_latency = llm_latency
+        self._stack = ExitStack()
+
+    def make_llm(self, **kwargs):
+        # The bots' LLM cache is kept, so the benchmark sees the hits production gets
+        return StubChatModel(responder=self.responder, latency=self.llm_latency, cache=kwargs.get("cache"))
+
+    def __enter__(self):
+        stubs = make_search_stubs(self.search_api)
+        for data_type, (module, _) in BOT_MODULES.items():
+            self._stack.enter_context(mock.patch.object(module, "get_chat_model", self.make_llm))
+            for name, stub in stubs.items():
+                if hasattr(module, name):
+                    self._stack.enter_context(mock.patch.object(module, name, stub))
+
+        # No quota to protect offline, and a cold cache per environment
+        unlimited = {provider: {"rpm": 1e9, "concurrency": 1000} for provider in scheduler.DEFAULT_LIMITS}
+        self._stack.enter_context(mock.patch.object(scheduler, "_scheduler", scheduler.Scheduler(limits=unlimited)))
+        cache = search_cache.SearchCache(os.path.join(self.workdir, "search_cache.db"))
+        self._stack.enter_context(mock.patch.object(search_cache, "_search_cache", cache))
+        self.trace_store = tracing.JSONLTraceStore(os.path.join(self.workdir, "traces.jsonl"))
+        self._stack.enter_context(mock.patch.object(tracing, "_tracer", tracing.Tracer(self.trace_store)))
+        llm = llm_cache.LLMResponseCache(os.path.join(self.workdir, "llm_cache.db"))
+        self._stack.enter_context(mock.patch.object(llm_cache, "_llm_cache", llm))
+        flights = single_flight.SingleFlight(os.path.join(self.workdir, "single_flight.db"))
+        self._stack.enter_context(mock.patch.object(single_flight, "_single_flight", flights))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def seed_store(data_manager, size, fixtures):
+    entries = {
+        data_type: {"data": fill_template(answer, "BENCH"), "last_updated": "2025-01-01T00:00:00"}
+        for data_type, answer in fixtures.answers.items()
+    }
+    start = time.monotonic()
+    data_manager.backend.put_many(
+        (f"BENCH-{i:06d}", data_type, entry)
+        for i in range(size)
+        for data_type, entry in entries.items()
+    )
+    return time.monotonic() - start
+
+
+def time_storage_writes(data_manager, writes, fixtures):
+    data = fill_template(fixtures.answers["basic_info"], "BENCH-WRITE")
+    samples = []
+    for i in range(writes):
+        start = time.monotonic()
+        data_manager.append_satellite_data(f"BENCH-WRITE-{i:04d}", "basic_info", data)
+        samples.append(time.monotonic() - start)
+    return samples
+
+
+def run_case(size, backend, runs, args):
+    with tempfile.TemporaryDirectory(prefix="satbench-") as workdir:
+        with OfflineEnvironment(workdir, args.llm_latency, args.search_latency,
+                                args.parse_failure_rate, args.seed) as env:
+            data_manager = SatelliteDataManager(os.path.join(workdir, "satellite_data.json"), backend=backend)
+            seed_seconds = seed_store(data_manager, size, env.fixtures)
+
+            # JSONFileBackend rewrites the whole file per write; keep its sample small at large sizes
+            writes = args.storage_writes if backend != "json" else min(args.storage_writes, max(3, 100000 // size))
+            write_samples = time_storage_writes(data_manager, writes, env.fixtures)
+
+            agents = {}
+            for data_type, (_, bot_class) in BOT_MODULES.items():
+                bot = bot_class(data_manager=data_manager)
+                wall = []
+                parse_stats(reset=True)
+                for run in range(runs):
+                    start = time.monotonic()
+                    bot.process_satellite(f"BENCH-RUN-{run:03d}")
+                    wall.append(time.monotonic() - start)
+                parsing = parse_stats().get(data_type, {"attempts": 0, "stages": {}, "field_recovery_rate": 0.0})
+                iterations = env.responder.calls[data_type]
+                # Researching a satellite again must be served entirely from the LLM and search caches
+                calls_before = sum(env.responder.calls.values())
+                if runs:
+                    bot.process_satellite("BENCH-RUN-000")
+                repeat_calls = sum(env.responder.calls.values()) - calls_before
+                attempts = parsing["attempts"]
+                stages = parsing["stages"]
+                agents[data_type] = {
+                    "runs": runs,
+                    "wall_mean_s": sum(wall) / len(wall) if wall else 0.0,
+                    "wall_p95_s": percentile(wall, 95),
+                    "iterations_per_run": iterations / runs if runs else 0.0,
+                    # Answers strict JSON parsing could not read, and what became of them
+                    "parse_failure_rate": 1 - stages.get("strict", 0) / attempts if attempts else 0.0,
+                    "repaired_rate": stages.get("repair", 0) / attempts if attempts else 0.0,
+                    "reformatted_rate": stages.get("reformat", 0) / attempts if attempts else 0.0,
+                    "unparsed_rate": stages.get("failed", 0) / attempts if attempts else 0.0,
+                    "field_recovery_rate": parsing["field_recovery_rate"],
+                    "repeat_llm_calls": repeat_calls,
+                }
+            search_calls = env.search_api.calls
+            # Every LLM call that missed the cache must have been admitted by the scheduler
+            llm_spans = [span for span in env.trace_store.read() if span["kind"] == "llm"]
+            llm_cache_hits = sum(1 for span in llm_spans if span["attrs"].get("cache_hit"))
+            llm_scheduled = sum(1 for span in llm_spans if "attempts" in span["attrs"])
+            data_manager.backend.close()
+
+    return {
+        "size": size,
+        "backend": backend,
+        "seed_s": seed_seconds,
+        "storage_write_mean_ms": 1000 * sum(write_samples) / len(write_samples),
+        "storage_write_p95_ms": 1000 * percentile(write_samples, 95),
+        "search_api_calls": search_calls,
+        "llm_calls": len(llm_spans),
+        "llm_cache_hits": llm_cache_hits,
+        "llm_calls_scheduled": llm_scheduled,
+        "agents": agents,
+    }
+
+
+def print_case(case):
+    print(f"\n== {case['size']} satellites, {case['backend']} backend "
+          f"(seeded in {case['seed_s']:.2f}s, {case['search_api_calls']} search API calls) ==")
+    print(f"storage write: mean {case['storage_write_mean_ms']:.2f} ms, p95 {case['storage_write_p95_ms']:.2f} ms")
+    print(f"LLM calls: {case['llm_calls']}, {case['llm_cache_hits']} served from the cache, "
+          f"{case['llm_calls_scheduled']} through the scheduler")
+    print(f"{'agent':<18}{'wall mean':>11}{'wall p95':>11}{'iters/run':>11}{'parse fail':>12}"
+          f"{'repaired':>10}{'reformat':>10}{'unparsed':>10}{'fields':>8}{'repeat calls':>14}")
+    for data_type, stats in case["agents"].items():
+        print(f"{data_type:<18}{stats['wall_mean_s']:>10.2f}s{stats['wall_p95_s']:>10.2f}s"
+              f"{stats['iterations_per_run']:>11.1f}{stats['parse_failure_rate']:>11.0%}"
+              f"{stats['repaired_rate']:>10.0%}{stats['reformatted_rate']:>10.0%}"
+              f"{stats['unparsed_rate']:>10.0%}{stats['field_recovery_rate']:>8.0%}"
+              f"{stats['repeat_llm_calls']:>14}")
+
+
+# Modules that only the research agents need; app.py must not import them to browse data
+AGENT_STACK_MODULES = [
+    "langchain", "langchain_core", "langchain_community", "langchain_google_genai",
+    "serpapi", "duckduckgo_search", "tavily",
+]
+
+# Runs app.py once the way a new session does, through Streamlit's script runner
+IMPORT_CHECK = """
+import json, os, sys, time
+sys.path.insert(0, {repo_dir!r})
+from streamlit.testing.v1 import AppTest
+app_test = AppTest.from_file(os.path.join({repo_dir!r}, "app.py"), default_timeout=300)
+start = time.perf_counter()
+app_test.run()
+elapsed = time.perf_counter() - start
+loaded = sorted(name for name in {modules!r} if name in sys.modules)
+errors = [str(exception.value) for exception in app_test.exception]
+print(json.dumps({{"seconds": elapsed, "agent_modules": loaded, "errors": errors}}))
+"""
+
+
+def check_import_budget(budget):
+    """Time a cold first run of app.py in a fresh interpreter, with streamlit.testing's AppTest.
+
+    A bare `import app` cannot work: the script reads st.session_state, which
+    only exists under a script runner. Streamlit's own import is excluded
+    since it is paid once per server, not per session. Runs in an empty
+    directory so the real database is untouched.
+    """
+    code = IMPORT_CHECK.format(repo_dir=REPO_DIR, modules=AGENT_STACK_MODULES)
+    with tempfile.TemporaryDirectory(prefix="satbench-import-") as workdir:
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True, timeout=600,
+            env=dict(os.environ, TRACE_STORE="off")
+        )
+    if result.returncode != 0:
+        print(f"Running app.py failed:\n{result.stderr}")
+        return False
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    print(f"app.py cold start: {report['seconds']:.2f}s (budget {budget:.2f}s)")
+    if report["errors"]:
+        print(f"app.py raised: {'; '.join(report['errors'])}")
+    if report["agent_modules"]:
+        print(f"Agent stack loaded at startup: {', '.join(report['agent_modules'])}")
+    return report["seconds"] <= budget and not report["agent_modules"] and not report["errors"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark with stub LLM and search providers")
+    parser.add_argument("--sizes", default="10,1000,100000", help="Comma-separated dataset sizes")
+    parser.add_argument("--backends", default="journal,sqlite,json", help="Comma-separated storage backends")
+    parser.add_argument("--runs", type=int, default=3, help="Satellites researched per agent and case")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to each LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="Seconds added to each search call")
+    parser.add_argument("--parse-failure-rate", type=float, default=0.0,
+                        help="Probability that a final answer is truncated")
+    parser.add_argument("--storage-writes", type=int, default=20, help="Timed writes per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--import-budget", type=float,
+                        help="Only check that app.py starts within this many seconds without the agent stack")
+    args = parser.parse_args(argv)
+
+    if args.import_budget is not None:
+        sys.exit(0 if check_import_budget(args.import_budget) else 1)
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for backend in [backend.strip() for backend in args.backends.split(",")]:
+            case = run_case(size, backend, args.runs, args)
+            print_case(case)
+            results.append(case)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    uncached = [
+        f"{case['size']}/{case['backend']}/{data_type}"
+        for case in results for data_type, stats in case["agents"].items() if stats["repeat_llm_calls"]
+    ]
+    if uncached:
+        print(f"Repeated runs reached the LLM instead of the cache: {', '.join(uncached)}")
+    unscheduled = [
+        f"{case['size']}/{case['backend']}" for case in results
+        if case["llm_calls_scheduled"] < case["llm_calls"] - case["llm_cache_hits"]
+    ]
+    if unscheduled:
+        print(f"LLM calls bypassed the scheduler: {', '.join(unscheduled)}")
+    if uncached or unscheduled:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
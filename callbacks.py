@@ -0,0 +1,149 @@
+import threading
+from collections import deque
+from langchain_core.callbacks import BaseCallbackHandler
+from tracing import get_tracer
+
+
+def token_usage(response):
+    """(prompt, completion) token counts reported by the provider, or None"""
+    usage = (response.llm_output or {}).get("token_usage") or (response.llm_output or {}).get("usage_metadata")
+    for generations in response.generations:
+        for generation in generations:
+            usage = usage or (generation.generation_info or {}).get("usage_metadata")
+            usage = usage or getattr(getattr(generation, "message", None), "usage_metadata", None)
+    if not usage:
+        return None
+    prompt = usage.get("prompt_tokens") or usage.get("input_tokens") or usage.get("prompt_token_count")
+    completion = (usage.get("completion_tokens") or usage.get("output_tokens")
+                  or usage.get("candidates_token_count"))
+    return prompt, completion
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain LLM and tool callbacks into tracer spans.
+
+    Callbacks for a synchronous agent run fire on the thread doing the work,
+    so the spans nest under the run span and caches or the scheduler can
+    annotate them. Token counts come from the provider when it reports them
+    and are otherwise estimated at four characters per token.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer or get_tracer()
+        self.spans = {}
+        self.llm_calls = 0
+        self.tool_calls = 0
+
+    def _start(self, run_id, kind, name, **attrs):
+        self.spans[run_id] = self.tracer.start_span(kind, name, **attrs)
+
+    def _end(self, run_id, error=None, **attrs):
+        span = self.spans.pop(run_id, None)
+        if span is not None:
+            span.set(**attrs)
+            self.tracer.end_span(span, error=error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        self.llm_calls += 1
+        self._start(
+            run_id, "llm", params.get("model") or params.get("model_name") or "llm",
+            provider=params.get("_type"),
+            prompt_chars=sum(len(prompt) for prompt in prompts)
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompts = ["\n".join(str(message.content) for message in batch) for batch in messages]
+        self.on_llm_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        completion_chars = sum(len(g.text) for generations in response.generations for g in generations)
+        span = self.spans.get(run_id)
+        usage = token_usage(response)
+        if usage:
+            prompt_tokens, completion_tokens = usage
+            estimated = False
+        else:
+            prompt_tokens = span.attrs.get("prompt_chars", 0) // 4 if span else None
+            completion_tokens = completion_chars // 4
+            estimated = True
+        self._end(
+            run_id,
+            completion_chars=completion_chars,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=estimated
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.tool_calls += 1
+        self._start(run_id, "tool", (serialized or {}).get("name", "tool"), input=str(input_str)[:200])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+class StreamingLogHandler(BaseCallbackHandler):
+    """Collects an agent run's thoughts, actions and observations as log lines.
+
+    Only the last `max_lines` lines are kept, and long observations are cut
+    to `max_chars`, so memory and rendering cost stay bounded however long
+    the run gets. Handlers are per run, so concurrent agents never share a
+    log. `on_update` is called (on the agent's thread) after each event; UIs
+    use it to schedule a throttled refresh.
+    """
+
+    def __init__(self, max_lines=200, max_chars=300, on_update=None):
+        self.buffer = deque(maxlen=max_lines)
+        self.max_chars = max_chars
+        self.on_update = on_update
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def add(self, text):
+        with self._lock:
+            for line in str(text).strip().splitlines():
+                if line.strip():
+                    self.buffer.append(line if len(line) <= self.max_chars else line[:self.max_chars] + "...")
+            self.version += 1
+        if self.on_update:
+            self.on_update()
+
+    def lines(self):
+        with self._lock:
+            return list(self.buffer)
+
+    def on_agent_action(self, action, **kwargs):
+        self.add(action.log)
+
+    def on_tool_end(self, output, **kwargs):
+        observation = " ".join(str(output).split())
+        self.add(f"Observation: {observation}")
+
+    def on_tool_error(self, error, **kwargs):
+        self.add(f"Tool error: {str(error)}")
+
+    def on_llm_error(self, error, **kwargs):
+        self.add(f"LLM error: {str(error)}")
+
+    def on_agent_finish(self, finish, **kwargs):
+        self.add("Final answer received.")
+
+
+def invoke_agent(agent_executor, input_dict, name, callbacks=None):
+    """Invoke an AgentExecutor inside a "run" span with LLM and tool calls traced.
+
+    `callbacks` are extra LangChain handlers for this run, e.g. a
+    StreamingLogHandler feeding the UI.
+    """
+    handler = TraceCallbackHandler()
+    with handler.tracer.span("run", name, question=input_dict.get("input")) as span:
+        result = agent_executor.invoke(input_dict, config={"callbacks": [handler] + list(callbacks or [])})
+        span.set(llm_calls=handler.llm_calls, tool_calls=handler.tool_calls)
+    return result
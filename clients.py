@@ -0,0 +1,72 @@
+import threading
+from langchain_google_genai import ChatGoogleGenerativeAI
+from scheduler import get_scheduler
+from search_cache import get_search_cache
+from tracing import get_tracer
+
+
+class ScheduledChatModel:
+    """Chat model mixin whose API calls go through the shared scheduler's "gemini" limits.
+
+    LangChain consults the LLM cache before calling `_generate`, so cache hits
+    never use quota. A streamed call is scheduled as one call, holding its
+    slot until the whole response has arrived.
+    """
+
+    def _generate(self, *args, **kwargs):
+        return get_scheduler().call("gemini", super()._generate, *args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        stream = super()._stream
+        yield from get_scheduler().call("gemini", lambda: list(stream(*args, **kwargs)))
+
+
+class ScheduledChatGoogleGenerativeAI(ScheduledChatModel, ChatGoogleGenerativeAI):
+    """Gemini chat model rate-limited, prioritized and retried by the shared scheduler"""
+
+
+_chat_models = {}
+_chat_models_lock = threading.Lock()
+
+
+def get_chat_model(**params):
+    """Return a shared ScheduledChatGoogleGenerativeAI for these parameters.
+
+    The client and its connection to the API are set up once per process
+    and reused by every bot (and every Streamlit session) asking for the
+    same model settings.
+    """
+    key = tuple(sorted((name, id(value) if name == "cache" else value) for name, value in params.items()))
+    with _chat_models_lock:
+        if key not in _chat_models:
+            _chat_models[key] = ScheduledChatGoogleGenerativeAI(**params)
+        return _chat_models[key]
+
+
+def search_func(provider, func):
+    """Wrap a raw search function with the shared cache and the provider's rate limits.
+
+    Failures that survive the scheduler's retries are returned as the
+    observation text (as TavilySearchResults does) instead of aborting the
+    agent run, and are never cached.
+    """
+    cached = get_search_cache().wrap(provider, get_scheduler().wrap(provider, func))
+
+    def search(query):
+        try:
+            with get_tracer().span("search", provider, provider=provider, query=str(query)[:200]):
+                return cached(query)
+        except Exception as e:
+            return f"{provider} search failed: {str(e)}"
+
+    search.__name__ = f"{provider}_search"
+    return search
+
+
+def tavily_search_func(search):
+    """search_func for a TavilySearchResults tool.
+
+    Calls the API wrapper directly because TavilySearchResults.run turns errors
+    into result strings, which would hide rate limits from the scheduler.
+    """
+    return search_func("tavily", lambda query: search.api_wrapper.results(query, search.max_results))
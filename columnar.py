@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+import pandas as pd
+from name_index import CONSTELLATION_PATTERN
+from refresh import PLACEHOLDER_VALUES
+from schemas import FIELDS
+
+# Costs quoted in rupees (common for ISRO missions) are converted at this rate
+INR_PER_USD = float(os.getenv("INR_PER_USD", 83.0))
+
+NUMBER = r"(-?\d[\d,]*(?:\.\d+)?)"
+# Skips the upper bound of a range, "500-600" or "500 to 600"
+RANGE_TAIL = r"(?:\s*(?:-|–|to)\s*\d[\d,]*(?:\.\d+)?)?"
+
+LENGTH_KM = {"": 1.0, "km": 1.0, "kms": 1.0, "kilometers": 1.0, "kilometres": 1.0,
+             "m": 0.001, "meters": 0.001, "metres": 0.001, "mi": 1.609344, "miles": 1.609344}
+MASS_KG = {"": 1.0, "kg": 1.0, "kgs": 1.0, "kilograms": 1.0, "t": 1000.0, "ton": 1000.0, "tons": 1000.0,
+           "tonnes": 1000.0, "tonne": 1000.0, "lb": 0.45359237, "lbs": 0.45359237, "pounds": 0.45359237}
+MAGNITUDE = {"": 1.0, "k": 1e3, "thousand": 1e3, "m": 1e6, "mn": 1e6, "million": 1e6, "millions": 1e6,
+             "b": 1e9, "bn": 1e9, "billion": 1e9, "billions": 1e9, "lakh": 1e5, "lakhs": 1e5,
+             "crore": 1e7, "crores": 1e7, "cr": 1e7}
+# Only magnitude words count after an amount, so "50 USD" is 50 and not NA
+MAGNITUDE_PATTERN = "(?:" + "|".join(sorted(filter(None, MAGNITUDE), key=len, reverse=True)) + r")?\b"
+FLAGS = {"true": True, "yes": True, "success": True, "successful": True, "reusable": True,
+         "false": False, "no": False, "failure": False, "failed": False, "expendable": False}
+
+# Typed columns per data type: flattened source column -> (typed column, kind)
+TYPED_COLUMNS = {
+    "basic_info": {
+        "altitude": ("altitude_km", "length_km"),
+        "orbital_life_years": ("orbital_life_years", "number"),
+        "number_of_payloads": ("number_of_payloads", "number"),
+    },
+    "technical_specs": {},
+    "launch_cost_info": {
+        "launch_cost": ("launch_cost_usd", "usd"),
+        "launch_date": ("launch_date", "date"),
+        "launch_mass_max_leo": ("launch_mass_max_leo_kg", "mass_kg"),
+        "launch_mass_actual_mass": ("launch_mass_actual_mass_kg", "mass_kg"),
+        "launch_success": ("launch_success", "flag"),
+        "vehicle_reusability": ("vehicle_reusability", "flag"),
+        "mission_cost_overall_cost": ("mission_cost_overall_usd", "usd"),
+        "mission_cost_vehicle_cost": ("mission_cost_vehicle_usd", "usd"),
+        "mission_cost_development_cost": ("mission_cost_development_usd", "usd"),
+        "mission_cost_approved_cost": ("mission_cost_approved_usd", "usd"),
+        "mission_cost_operational_cost": ("mission_cost_operational_usd", "usd"),
+    },
+}
+
+
+def flatten(data):
+    """Flatten nested objects one level: {"launch_mass": {"max_leo": ..}} -> {"launch_mass_max_leo": ..}.
+
+    Older records already store these flattened, so both shapes end up in the same columns.
+    """
+    flat = {}
+    for key, value in (data or {}).items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                flat[f"{key}_{sub_key}"] = sub_value
+        else:
+            flat[key] = value
+    return flat
+
+
+def as_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def clean_text(series):
+    """String dtype with placeholders ("Not found", "N/A", ...) as NA"""
+    text = series.map(as_text).astype("string").str.strip()
+    return text.mask(text.str.lower().isin(PLACEHOLDER_VALUES))
+
+
+def to_float(strings):
+    """Extracted number strings (with thousands separators) to float64, NaN where missing"""
+    return pd.to_numeric(strings.astype(object).str.replace(",", "", regex=False), errors="coerce").astype("float64")
+
+
+def leading_quantity(text, unit_pattern=r"[a-z]*"):
+    """The first number in each value (the lower bound of a range such as "500-600 km") and the word after it"""
+    parts = text.str.lower().astype(object).str.extract(NUMBER + RANGE_TAIL + r"\s*(" + unit_pattern + r")")
+    return to_float(parts[0]), parts[1].fillna("")
+
+
+def parse_number(text):
+    return leading_quantity(text)[0].astype("Float64")
+
+
+def parse_scaled(text, units):
+    """A number followed by an optional unit, converted with the `units` factors; unknown units are NA"""
+    value, unit = leading_quantity(text)
+    return (value * unit.map(units).astype("float64")).astype("Float64")
+
+
+def parse_usd(text):
+    """Money in USD: handles $/USD/INR/₹/Rs, and million/billion/crore/lakh magnitudes.
+
+    Amounts without a currency are taken as USD (the schema asks for USD);
+    other currencies are NA rather than guessed.
+    """
+    lower = text.str.lower()
+    value, magnitude = leading_quantity(text, MAGNITUDE_PATTERN)
+    inr = lower.str.contains(r"₹|\binr\b|\brs\b|rupee", regex=True).fillna(False).astype(bool)
+    other = lower.str.contains(r"€|£|¥|\beur\b|\beuros?\b|\bgbp\b|\byen\b", regex=True).fillna(False).astype(bool)
+    rate = pd.Series(1.0, index=text.index).mask(inr, 1.0 / INR_PER_USD)
+    return (value * magnitude.map(MAGNITUDE).astype("float64") * rate).mask(other).astype("Float64")
+
+
+def parse_flag(text):
+    """1/0 (also "1.0"), true/false, yes/no, success/failure as a nullable boolean"""
+    lower = text.str.lower().astype(object)
+    numeric = pd.to_numeric(lower, errors="coerce").map({1.0: True, 0.0: False})
+    words = lower.str.extract(r"^([a-z]+)")[0].map(FLAGS)
+    return numeric.fillna(words).astype("boolean")
+
+
+def parse_date(text):
+    """Naive UTC datetimes; free text that is not a date becomes NaT"""
+    return pd.to_datetime(text.astype(object), errors="coerce", format="mixed", utc=True).dt.tz_convert(None)
+
+
+PARSERS = {
+    "number": parse_number,
+    "length_km": lambda text: parse_scaled(text, LENGTH_KM),
+    "mass_kg": lambda text: parse_scaled(text, MASS_KG),
+    "usd": parse_usd,
+    "flag": parse_flag,
+    "date": parse_date,
+}
+
+
+def typed_frame(data_type, rows):
+    """Build the typed wide table for `rows`, a {satellite_name: entry} mapping"""
+    names = list(rows)
+    raw = pd.DataFrame(
+        [flatten(rows[name].get("data") if isinstance(rows[name].get("data"), dict) else {}) for name in names],
+        index=pd.Index(names, name="satellite")
+    )
+    typed = pd.DataFrame(index=raw.index)
+    typed["last_updated"] = parse_date(pd.Series([rows[name].get("last_updated") for name in names], index=raw.index))
+    conversions = TYPED_COLUMNS.get(data_type, {})
+    # Schema fields first, in schema order, then anything else older records carry
+    schema_columns = [column for column in flatten_schema(data_type) if column in raw.columns]
+    for column in schema_columns + [column for column in raw.columns if column not in schema_columns]:
+        text = clean_text(raw[column])
+        if column in conversions:
+            target, kind = conversions[column]
+            typed[target] = PARSERS[kind](text)
+        else:
+            typed[column] = text
+    for column, (target, kind) in conversions.items():
+        if target not in typed.columns:
+            typed[target] = pd.Series(pd.NA, index=typed.index, dtype="datetime64[ns]" if kind == "date" else
+                                      "boolean" if kind == "flag" else "Float64")
+    return typed
+
+
+def flatten_schema(data_type):
+    """Flattened column names of a data type's schema, nested objects expanded by their known keys"""
+    nested = {
+        "sensor_specs": ["spectral_bands", "spatial_resolution"],
+        "launch_mass": ["max_leo", "actual_mass"],
+        "mission_cost": ["overall_cost", "vehicle_cost", "development_cost", "approved_cost", "operational_cost"],
+    }
+    columns = []
+    for name, _ in FIELDS.get(data_type, []):
+        if name in nested:
+            columns.extend(f"{name}_{key}" for key in nested[name])
+        else:
+            columns.append(name)
+    return columns
+
+
+class ColumnarView:
+    """Typed wide tables, one per data type, indexed by satellite name.
+
+    Nested objects are flattened (launch_mass_max_leo, mission_cost_overall_cost,
+    ...), quantities are parsed into float columns in km, kg and USD, flags
+    into booleans and dates into datetimes, with NA wherever a value is
+    missing or unparseable. Tables are built on first use and then kept up
+    to date from the data manager's change notifications: only the
+    satellites that were written are re-parsed.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self._tables = {}
+        self._dirty = {}
+        self._fleet = None
+        self._fleet_sources = ()
+        self._lock = threading.RLock()
+        data_manager.add_listener(self._on_change)
+
+    def _on_change(self, changes):
+        with self._lock:
+            if changes is None:
+                self._tables.clear()
+                self._dirty.clear()
+                return
+            for satellite_name, data_type in changes:
+                for table_type in ([data_type] if data_type else list(self._tables)):
+                    if table_type in self._tables:
+                        self._dirty.setdefault(table_type, set()).add(satellite_name)
+
+    def table(self, data_type):
+        """The typed table for a data type; treat it as read-only, it is shared"""
+        with self._lock:
+            if data_type not in self._tables:
+                rows = {name: entry for name, _, entry in self.data_manager.iter_records([data_type])}
+                self._tables[data_type] = typed_frame(data_type, rows)
+                self._dirty.pop(data_type, None)
+            elif self._dirty.get(data_type):
+                self._tables[data_type] = self._apply(data_type, self._dirty.pop(data_type))
+            return self._tables[data_type]
+
+    def _apply(self, data_type, satellite_names):
+        table = self._tables[data_type]
+        rows = {}
+        for satellite_name in satellite_names:
+            entry = self.data_manager.get_satellite_data(satellite_name, data_type)
+            if entry:
+                rows[satellite_name] = entry
+        kept = table.drop(index=[name for name in satellite_names if name in table.index])
+        if not rows:
+            return kept
+        updated = typed_frame(data_type, rows)
+        if not len(kept):
+            return updated
+        # concat widens columns missing on one side to object; keep the typed dtypes
+        dtypes = {**kept.dtypes.to_dict(), **updated.dtypes.to_dict()}
+        return pd.concat([kept, updated]).astype(dtypes)
+
+    def tables(self):
+        return {data_type: self.table(data_type) for data_type in FIELDS}
+
+    def fleet(self):
+        """All data types side by side, one row per satellite, plus constellation and launch_year.
+
+        Each data type's last_updated becomes <data_type>_updated. The joined
+        table is rebuilt only when one of the per-type tables has changed.
+        """
+        with self._lock:
+            tables = tuple(self.table(data_type) for data_type in FIELDS)
+            if self._fleet is not None and all(a is b for a, b in zip(tables, self._fleet_sources)):
+                return self._fleet
+            fleet = pd.concat(
+                [table.rename(columns={"last_updated": f"{data_type}_updated"}) for data_type, table in zip(FIELDS, tables)],
+                axis=1
+            )
+            fleet.index.name = "satellite"
+            names = fleet.index.to_series().astype("string").str.strip()
+            fleet.insert(0, "constellation", names.str.extract(CONSTELLATION_PATTERN)[0].str.upper())
+            if "launch_date" in fleet.columns:
+                fleet["launch_year"] = fleet["launch_date"].dt.year.astype("Int64")
+            self._fleet = fleet
+            self._fleet_sources = tables
+            return fleet
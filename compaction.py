@@ -0,0 +1,174 @@
+"""Observation compaction between the search tools and the agent.
+
+Raw tool output (multi_search listings, Tavily result lists, SerpAPI text)
+is split into passages per source. Boilerplate and passages already shown
+earlier in the run are dropped, and the rest are scored for relevance to
+the schema fields and the query. The best passages that fit in
+`max_chars` are kept, in their original order and under their source
+URL, so the agent can still cite it.
+"""
+import ast
+import os
+import re
+
+# Characters of one compacted observation
+OBSERVATION_MAX_CHARS = int(os.getenv("OBSERVATION_MAX_CHARS", 1500))
+# Characters of all observations in the scratchpad; older ones are shrunk to stay under it
+SCRATCHPAD_MAX_CHARS = int(os.getenv("SCRATCHPAD_MAX_CHARS", 5000))
+# Observations shorter than this (errors, "no results") are passed through unchanged
+PASSTHROUGH_CHARS = 300
+
+BOILERPLATE = re.compile(
+    r"cookie|privacy policy|terms of (?:use|service)|all rights reserved|sign in|log in|subscribe|newsletter"
+    r"|skip to (?:main )?content|advertisement|share this|follow us|click here|read more|javascript",
+    re.IGNORECASE
+)
+LISTING_HEADER = re.compile(r"^\s*\d+\.\s+(.*?)\s+\((https?://[^)\s]+)\)\s*$")
+PASSAGE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])|\s*\n+\s*|\s+[|•·]\s+")
+QUERY_TERM = re.compile(r"[a-z][a-z0-9]{2,}")
+
+
+def result_items(observation):
+    """(title, url, text) items of a tool output, whatever shape the tool returned"""
+    if isinstance(observation, str):
+        text = observation.strip()
+        if text.startswith("[{"):
+            # SerpAPI and some wrappers return a list of dicts rendered as a string
+            try:
+                observation = ast.literal_eval(text)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                pass
+    if isinstance(observation, list):
+        items = []
+        for result in observation:
+            if isinstance(result, dict):
+                text = result.get("content") or result.get("snippet") or result.get("answer") or ""
+                items.append((result.get("title", ""), result.get("url") or result.get("link", ""), str(text)))
+            else:
+                items.append(("", "", str(result)))
+        return items
+
+    items = []
+    current = None
+    for line in str(observation).splitlines():
+        header = LISTING_HEADER.match(line)
+        if header:
+            current = [header.group(1), header.group(2), []]
+            items.append(current)
+        elif current is not None:
+            current[2].append(line)
+        elif line.strip():
+            if not items or items[0][1]:
+                items.insert(0, ["", "", []])
+            items[0][2].append(line)
+    return [(title, url, " ".join(lines)) for title, url, lines in items]
+
+
+def passage_key(passage):
+    return re.sub(r"[^a-z0-9]", "", passage.lower())
+
+
+class ObservationCompactor:
+    """Compacts one agent run's observations; create one per run.
+
+    `patterns` are (keyword regex, value regex or None) pairs for the schema
+    fields (see adaptive_executor.field_pattern): a passage scores for a
+    keyword and more for a keyword with a value, plus a little per query
+    term it contains.
+    """
+
+    def __init__(self, patterns, max_chars=OBSERVATION_MAX_CHARS, scratchpad_chars=SCRATCHPAD_MAX_CHARS):
+        self.patterns = list(patterns)
+        self.max_chars = max_chars
+        self.scratchpad_chars = scratchpad_chars
+        self.seen = set()
+        self.raw_chars = 0
+        self.compacted_chars = 0
+
+    def score(self, passage, query_terms):
+        score = 0.0
+        for keywords, value in self.patterns:
+            if keywords.search(passage):
+                score += 1.0
+                if value is not None and value.search(passage):
+                    score += 2.0
+        lowered = passage.lower()
+        score += 0.5 * sum(1 for term in query_terms if term in lowered)
+        return score
+
+    def compact(self, observation, query="", max_chars=None, dedupe=True):
+        """The relevant, unseen passages of `observation` within `max_chars`, grouped by source"""
+        max_chars = max_chars or self.max_chars
+        raw = observation if isinstance(observation, str) else str(observation)
+        if dedupe:
+            self.raw_chars += len(raw)
+        if len(raw) <= PASSTHROUGH_CHARS:
+            if dedupe:
+                self.compacted_chars += len(raw)
+            return raw
+
+        query_terms = set(QUERY_TERM.findall(str(query).lower()))
+        items = result_items(observation)
+        candidates = []
+        for item_index, (title, url, text) in enumerate(items):
+            for passage in PASSAGE_SPLIT.split(text):
+                passage = " ".join(passage.split())
+                if len(passage) < 15 or BOILERPLATE.search(passage):
+                    continue
+                key = passage_key(passage)
+                if dedupe and key in self.seen:
+                    continue
+                score = self.score(passage, query_terms)
+                if score > 0:
+                    candidates.append((score, len(candidates), item_index, passage, key))
+
+        # Best passages first until the budget is spent; each new source also costs its header
+        chosen, chosen_keys, chosen_items = [], set(), set()
+        used = 0
+        for score, order, item_index, passage, key in sorted(candidates, key=lambda c: (-c[0], c[1])):
+            if key in chosen_keys:
+                continue
+            cost = len(passage) + 1
+            if item_index not in chosen_items:
+                cost += len(items[item_index][0]) + len(items[item_index][1]) + 10
+            if used + cost > max_chars:
+                continue
+            chosen.append((order, item_index, passage))
+            chosen_keys.add(key)
+            chosen_items.add(item_index)
+            used += cost
+
+        if chosen:
+            lines = []
+            for item_index in sorted(chosen_items):
+                title, url, _ = items[item_index]
+                passages = [passage for _, index, passage in sorted(chosen) if index == item_index]
+                header = f"{title} ({url})" if url else title or "Result"
+                lines.append(f"{len(lines) + 1}. {header}\n   {' '.join(passages)}")
+            result = "\n".join(lines)
+        elif dedupe:
+            result = "No new relevant information in these results (already seen or off-topic); try a different query."
+        else:
+            result = raw[:max_chars]
+        if dedupe:
+            self.seen.update(chosen_keys)
+            self.compacted_chars += len(result)
+        return result
+
+    def fit_scratchpad(self, observations):
+        """Shrink the oldest observations until all of them fit in scratchpad_chars.
+
+        Takes and returns a list of observation strings; the latest one is
+        never shrunk, older ones are cut to their best passages, down to a
+        floor of a few hundred characters each.
+        """
+        observations = list(observations)
+        total = sum(len(observation) for observation in observations)
+        for i in range(len(observations) - 1):
+            if total <= self.scratchpad_chars:
+                break
+            target = max(PASSTHROUGH_CHARS, len(observations[i]) // 3)
+            shrunk = self.compact(observations[i], max_chars=target, dedupe=False)
+            total -= len(observations[i]) - len(shrunk)
+            observations[i] = shrunk
+        return observations
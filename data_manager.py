@@ -1,72 +1,194 @@
 import pandas as pd
 import json
-import os
 from datetime import datetime
+from storage import create_backend
+from tracing import get_tracer
 
 class SatelliteDataManager:
-    def __init__(self):
-        self.data_file = "satellite_data.json"
-        self.load_data()
+    def __init__(self, data_file="satellite_data.json", backend=None):
+        self.data_file = data_file
+        if backend is None or isinstance(backend, str):
+            backend = create_backend(backend, data_file)
+        self.backend = backend
+        self._listeners = []
+        self._table_view = None
+        self._search_index = None
+        self._family_knowledge = None
+        self._pending_metadata = {}
+
+    def add_listener(self, listener):
+        """Call `listener(changes)` after every write made through this manager.
+
+        `changes` is a list of (satellite_name, data_type) pairs, where a
+        data_type of None means all of that satellite's data; `changes` is
+        None when anything may have changed (an import, or a reload after
+        another process wrote). Derived caches use this to update
+        incrementally instead of rescanning storage.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, changes):
+        for listener in self._listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"Error in data change listener: {str(e)}")
 
     def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                self.data = json.load(f)
-        else:
-            self.data = {}
+        self.backend.load()
 
     def save_data(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=4)
+        self.backend.flush()
 
-    def append_satellite_data(self, satellite_name, data_type, data):
-        if satellite_name not in self.data:
-            self.data[satellite_name] = {}
-        
-        self.data[satellite_name][data_type] = {
+    def refresh(self):
+        """Pick up writes made by other processes (e.g. batch runs); returns True if anything changed"""
+        changed = self.backend.reload_if_changed()
+        if changed:
+            self._notify(None)
+        return changed
+
+    def attach_metadata(self, satellite_name, data_type, data, **metadata):
+        """Keep `metadata` for when this exact `data` object is stored for the record.
+
+        For code that produces data but leaves the write to its caller (bots
+        run with save=False); matched by identity, so it never ends up on
+        other data written for the same record.
+        """
+        self._pending_metadata[(satellite_name, data_type)] = (data, metadata)
+
+    def _take_metadata(self, satellite_name, data_type, data):
+        data_and_metadata = self._pending_metadata.pop((satellite_name, data_type), None)
+        if data_and_metadata is None or data_and_metadata[0] is not data:
+            return {}
+        return data_and_metadata[1]
+
+    def append_satellite_data(self, satellite_name, data_type, data, **metadata):
+        """Store data for one data type; extra keyword arguments are kept alongside it in the record"""
+        entry = {
             "data": data,
             "last_updated": datetime.now().isoformat()
         }
-        self.save_data()
+        entry.update(self._take_metadata(satellite_name, data_type, data))
+        entry.update(metadata)
+        with get_tracer().span("storage", "put", provider=type(self.backend).__name__, records=1):
+            self.backend.put(satellite_name, data_type, entry)
+        self._notify([(satellite_name, data_type)])
+
+    def append_many_satellite_data(self, records):
+        """Store several (satellite_name, data_type, data) records with a single storage commit"""
+        last_updated = datetime.now().isoformat()
+        records = [
+            (satellite_name, data_type, dict(
+                {"data": data, "last_updated": last_updated},
+                **self._take_metadata(satellite_name, data_type, data)
+            ))
+            for satellite_name, data_type, data in records
+        ]
+        with get_tracer().span("storage", "put_many", provider=type(self.backend).__name__, records=len(records)):
+            self.backend.put_many(records)
+        self._notify([(satellite_name, data_type) for satellite_name, data_type, _ in records])
 
     def get_satellite_data(self, satellite_name, data_type=None):
-        if satellite_name not in self.data:
-            return None
-        
         if data_type:
-            return self.data[satellite_name].get(data_type)
-        return self.data[satellite_name]
+            return self.backend.get_entry(satellite_name, data_type)
+        return self.backend.get(satellite_name)
 
     def get_all_satellites(self):
         """Get a list of all satellites in the database"""
-        return list(self.data.keys())
+        return self.backend.names()
 
     def delete_satellite_data(self, satellite_name):
         """Delete all data for a specific satellite"""
-        if satellite_name in self.data:
-            del self.data[satellite_name]
-            self.save_data()
-            return True
-        return False
+        with get_tracer().span("storage", "delete", provider=type(self.backend).__name__):
+            deleted = self.backend.delete(satellite_name)
+        if deleted:
+            self._notify([(satellite_name, None)])
+        return deleted
+
+    def import_json(self, path):
+        """Load satellites from a JSON file in the original satellite_data.json format"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.backend.put_many(
+            (satellite, dtype, info)
+            for satellite, satellite_data in data.items()
+            for dtype, info in satellite_data.items()
+        )
+        self._notify(None)
+        return len(data)
+
+    def export_json(self, path=None):
+        """Dump the whole database in the original satellite_data.json format"""
+        data = dict(self.backend.items())
+        if path is None:
+            return json.dumps(data, indent=4)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def iter_records(self, data_types=None, updated_since=None):
+        """Stream (satellite_name, data_type, entry) rows grouped by satellite, without loading the whole database.
+
+        `data_types` limits the rows to those data types; `updated_since` (a
+        datetime, date or ISO string) to records updated at or after it.
+        """
+        if hasattr(updated_since, "isoformat"):
+            updated_since = updated_since.isoformat()
+        data_types = list(data_types) if data_types else None
+        single = data_types[0] if data_types and len(data_types) == 1 else None
+        for satellite_name, data_type, entry in self.backend.records(single, updated_since):
+            if data_types and data_type not in data_types:
+                continue
+            yield satellite_name, data_type, entry
 
     def get_dataframe(self, data_type=None):
         """Convert the data to a pandas DataFrame with serializable values"""
         rows = []
-        for satellite, satellite_data in self.data.items():
-            for dtype, info in satellite_data.items():
-                if data_type and dtype != data_type:
-                    continue
-                
-                # Convert dictionary data to string representation
-                data = info["data"]
-                if isinstance(data, dict):
-                    data = json.dumps(data)
-                
-                rows.append({
-                    "Satellite": satellite,
-                    "Data Type": dtype,
-                    "Value": data,
-                    "Last Updated": info["last_updated"]
-                })
+        for satellite, dtype, info in self.backend.records(data_type):
+            # Convert dictionary data to string representation
+            data = info["data"]
+            if isinstance(data, dict):
+                data = json.dumps(data)
+            
+            rows.append({
+                "Satellite": satellite,
+                "Data Type": dtype,
+                "Value": data,
+                "Last Updated": info["last_updated"]
+            })
         
-        return pd.DataFrame(rows) 
\ No newline at end of file
+        return pd.DataFrame(rows)
+
+    def get_table(self, data_type):
+        """Typed wide table of one data type (numbers in km/kg/USD, flags, dates), indexed by satellite.
+
+        Built once and updated incrementally on writes; see columnar.py.
+        """
+        return self._columnar_view().table(data_type)
+
+    def get_fleet_table(self):
+        """All data types joined into one typed table, one row per satellite; see analytics.py for queries"""
+        return self._columnar_view().fleet()
+
+    def search_records(self, query, limit=None):
+        """Satellites whose stored text or source URLs contain every term of `query`.
+
+        Returns (satellite_name, matched fields) pairs; see search_index.py for
+        the field:term syntax (e.g. "satellite_application:sar source:skyrocket.de").
+        """
+        if self._search_index is None:
+            from search_index import SearchIndex
+            self._search_index = SearchIndex(self)
+        return self._search_index.search(query, limit)
+
+    def get_family_knowledge(self):
+        """Constellation templates the bots copy shared fields from; see families.py"""
+        if self._family_knowledge is None:
+            from families import FamilyKnowledge
+            self._family_knowledge = FamilyKnowledge(self)
+        return self._family_knowledge
+
+    def _columnar_view(self):
+        if self._table_view is None:
+            from columnar import ColumnarView
+            self._table_view = ColumnarView(self)
+        return self._table_view
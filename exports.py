@@ -0,0 +1,169 @@
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+from itertools import groupby
+from data_manager import SatelliteDataManager
+from schemas import FIELDS
+
+# Rows buffered per CSV chunk and per Parquet row group
+CHUNK_ROWS = 1000
+
+BASE_COLUMNS = ["satellite", "data_type", "last_updated"]
+
+
+def json_chunks(records):
+    """The satellite_data.json layout, written one satellite at a time"""
+    yield "{"
+    first = True
+    for satellite_name, rows in groupby(records, key=lambda row: row[0]):
+        satellite_data = {data_type: entry for _, data_type, entry in rows}
+        yield f'{"" if first else ","}\n    {json.dumps(satellite_name)}: {json.dumps(satellite_data)}'
+        first = False
+    yield "\n}\n"
+
+
+def ndjson_chunks(records):
+    """One JSON object per record and line"""
+    for satellite_name, data_type, entry in records:
+        yield json.dumps({
+            "satellite": satellite_name,
+            "data_type": data_type,
+            "last_updated": entry.get("last_updated"),
+            "data": entry.get("data"),
+        }) + "\n"
+
+
+def table_columns(data_types):
+    """Satellite, data type and timestamp, then the schema fields of the data types in schema order.
+
+    Values outside the schema (older records, extra metadata) go to an "extra"
+    JSON column so nothing is dropped.
+    """
+    columns = list(BASE_COLUMNS)
+    for data_type in data_types:
+        columns.extend(name for name, _ in FIELDS.get(data_type, []) if name not in columns)
+    return columns + ["extra"]
+
+
+def table_row(columns, satellite_name, data_type, entry):
+    data = entry.get("data") if isinstance(entry.get("data"), dict) else {"value": entry.get("data")}
+    row = {"satellite": satellite_name, "data_type": data_type, "last_updated": entry.get("last_updated")}
+    extra = {}
+    for key, value in data.items():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        if key in columns and key not in row:
+            row[key] = value
+        else:
+            extra[key] = value
+    row["extra"] = json.dumps(extra) if extra else None
+    return row
+
+
+def csv_chunks(records, data_types):
+    columns = table_columns(data_types)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for i, (satellite_name, data_type, entry) in enumerate(records, 1):
+        writer.writerow(table_row(columns, satellite_name, data_type, entry))
+        if i % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def parquet_chunks(records, data_types, chunk_size=1 << 20):
+    """Parquet written in row groups of CHUNK_ROWS to a temporary file, then streamed from it.
+
+    Parquet's footer is written last, so the file cannot be sent before it is
+    complete; memory still stays bounded by one row group. Needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    columns = table_columns(data_types)
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        with pq.ParquetWriter(path, schema) as writer:
+            batch = []
+            for satellite_name, data_type, entry in records:
+                row = table_row(columns, satellite_name, data_type, entry)
+                batch.append({column: None if row.get(column) is None else str(row[column]) for column in columns})
+                if len(batch) == CHUNK_ROWS:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+EXPORT_FORMATS = {
+    "json": {"extension": "json", "mime": "application/json"},
+    "ndjson": {"extension": "ndjson", "mime": "application/x-ndjson"},
+    "csv": {"extension": "csv", "mime": "text/csv"},
+    "parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def export_chunks(data_manager, fmt, data_types=None, updated_since=None):
+    """Yield the export in `fmt` chunk by chunk (bytes), reading records lazily from storage"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}. Choose from {', '.join(EXPORT_FORMATS)}")
+    records = data_manager.iter_records(data_types, updated_since)
+    if fmt == "json":
+        chunks = json_chunks(records)
+    elif fmt == "ndjson":
+        chunks = ndjson_chunks(records)
+    elif fmt == "csv":
+        chunks = csv_chunks(records, data_types or list(FIELDS))
+    else:
+        chunks = parquet_chunks(records, data_types or list(FIELDS))
+    for chunk in chunks:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def write_export(path, data_manager, fmt, data_types=None, updated_since=None):
+    """Write an export to `path` without holding it in memory; returns the number of bytes written"""
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in export_chunks(data_manager, fmt, data_types, updated_since):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored satellite data")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="json")
+    parser.add_argument("-o", "--output", help="Output file (default: satellite_export.<format>)")
+    parser.add_argument("--data-types", help=f"Comma-separated data types (default: all of {','.join(FIELDS)})")
+    parser.add_argument("--since", help="Only records updated at or after this ISO date/time")
+    parser.add_argument("--backend", help="Storage backend (default: $SATELLITE_STORAGE_BACKEND or journal)")
+    args = parser.parse_args(argv)
+
+    data_types = [data_type.strip() for data_type in args.data_types.split(",")] if args.data_types else None
+    output = args.output or f"satellite_export.{EXPORT_FORMATS[args.format]['extension']}"
+    data_manager = SatelliteDataManager(backend=args.backend)
+    size = write_export(output, data_manager, args.format, data_types, args.since)
+    print(f"Wrote {size} bytes to {output}")
+
+
+if __name__ == "__main__":
+    main()
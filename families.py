@@ -0,0 +1,207 @@
+"""Knowledge shared by the members of a constellation, so siblings skip most of the research.
+
+Opt-in with FAMILY_REUSE=on, and only for the constellations listed in
+FAMILY_CONSTELLATIONS: fleets whose members are one satellite model, such
+as STARLINK-1234 or ONEWEB-0012. A numbered name alone says nothing about
+the model (SENTINEL-1A is a radar satellite, SENTINEL-5P an atmospheric
+one), so other names are always researched on their own.
+
+For those fleets most fields describe the model and are the same for every
+member: the bus, sensors, application, launch vehicle, design life. Only
+the per-unit fields in schemas.PER_UNIT_FIELDS (altitude, launch date,
+launch site, launch outcome and cost) differ.
+
+Once one member has been researched, a new sibling copies the family fields
+from the best researched member and the agent runs only for its per-unit
+fields; a data type without per-unit fields needs no agent run at all.
+Copied fields are recorded in the record's `inherited_from` map (field: the
+satellite the value was researched for), next to `family`, and copied
+source URLs are prefixed with INHERITED_SOURCE so they never read as this
+satellite's own research.
+"""
+import copy
+import os
+import threading
+from collections import defaultdict
+from name_index import constellation
+from refresh import FieldRefresher, is_placeholder
+from schemas import PER_UNIT_FIELDS, field_names
+from tracing import get_tracer
+
+# "on" copies family fields between members of the constellations below
+FAMILY_REUSE = os.getenv("FAMILY_REUSE", "off")
+# Constellations (as name_index.constellation reports them) whose members share one satellite model
+FAMILY_CONSTELLATIONS = {
+    name.strip().upper()
+    for name in os.getenv("FAMILY_CONSTELLATIONS", "STARLINK,ONEWEB,IRIDIUM").split(",")
+    if name.strip()
+}
+# Share of a data type's family fields a member must have found to be copied from
+FAMILY_MIN_FOUND = float(os.getenv("FAMILY_MIN_FOUND", 0.5))
+# Prefix of a copied *_source value, followed by the satellite it was researched for
+INHERITED_SOURCE = "Inherited from"
+
+
+def family_of(satellite_name):
+    """The satellite's constellation if its members may share research, else None"""
+    family = constellation(satellite_name)
+    return family if family in FAMILY_CONSTELLATIONS else None
+
+
+def mark_inherited(field, value, origin):
+    """Copied value of `field`; source URLs are labelled with the satellite they were researched for"""
+    value = copy.deepcopy(value)
+    if field.endswith("_source") and not str(value).startswith(INHERITED_SOURCE):
+        return f"{INHERITED_SOURCE} {origin}: {value}"
+    return value
+
+
+def family_fields(data_type):
+    """Schema fields of `data_type` that are shared across a constellation, in schema order"""
+    per_unit = PER_UNIT_FIELDS.get(data_type, [])
+    return [field for field in field_names(data_type) if field not in per_unit]
+
+
+def template_score(entry, data_type):
+    """(family fields researched for this satellite itself, family fields found) of a stored record.
+
+    Directly researched values rank first, so copies of copies are only used
+    when no member has its own research.
+    """
+    data = entry.get("data") if entry else None
+    if not isinstance(data, dict):
+        return 0, 0
+    inherited = entry.get("inherited_from", {})
+    found = [field for field in family_fields(data_type) if not is_placeholder(data.get(field))]
+    return sum(1 for field in found if field not in inherited), len(found)
+
+
+class FamilyKnowledge:
+    """Picks, per constellation and data type, the stored member to copy family fields from.
+
+    The member list and the chosen templates are built on first use and
+    then follow the data manager's change notifications: a written record
+    only has to be compared with the current template of its family.
+    """
+
+    def __init__(self, data_manager, min_found=FAMILY_MIN_FOUND):
+        self.data_manager = data_manager
+        self.min_found = min_found
+        self._members = None
+        self._templates = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        data_manager.add_listener(self._on_change)
+
+    def _on_change(self, changes):
+        with self._lock:
+            if changes is None:
+                self._members = None
+                self._dirty.clear()
+                return
+            if self._members is not None:
+                self._dirty.update(changes)
+
+    def _ensure_current(self):
+        if self._members is None:
+            self._members = defaultdict(set)
+            self._templates = {}
+            self._dirty.clear()
+            for satellite_name in self.data_manager.get_all_satellites():
+                family = family_of(satellite_name)
+                if family:
+                    self._members[family].add(satellite_name)
+            return
+        dirty, self._dirty = self._dirty, set()
+        for satellite_name, data_type in dirty:
+            family = family_of(satellite_name)
+            if not family:
+                continue
+            stored = self.data_manager.get_satellite_data(satellite_name) or {}
+            if stored:
+                self._members[family].add(satellite_name)
+            else:
+                self._members[family].discard(satellite_name)
+            for key in [key for key in self._templates if key[0] == family]:
+                if data_type is not None and key[1] != data_type:
+                    continue
+                best = self._templates[key]
+                if best is not None and best[1] == satellite_name:
+                    # The template itself changed: pick again on the next lookup
+                    del self._templates[key]
+                elif key[1] in stored:
+                    score = template_score(stored[key[1]], key[1])
+                    if best is None or score > best[0]:
+                        self._templates[key] = (score, satellite_name)
+
+    def template(self, family, data_type):
+        """(satellite_name, stored entry) of the member to copy `family`'s fields from, or None"""
+        with self._lock:
+            self._ensure_current()
+            key = (family, data_type)
+            if key not in self._templates:
+                best = None
+                for satellite_name in self._members.get(family, ()):
+                    score = template_score(self.data_manager.get_satellite_data(satellite_name, data_type), data_type)
+                    if score[1] and (best is None or score > best[0]):
+                        best = (score, satellite_name)
+                self._templates[key] = best
+            best = self._templates[key]
+        if best is None or best[0][1] < self.min_found * len(family_fields(data_type)):
+            return None
+        entry = self.data_manager.get_satellite_data(best[1], data_type)
+        return (best[1], entry) if entry else None
+
+    def research(self, bot, satellite_name, save=True, callbacks=None):
+        """Fill `satellite_name` from its family and research only its per-unit fields.
+
+        Returns the data, or None when reuse is off, the satellite is not in
+        one of FAMILY_CONSTELLATIONS, no member has enough of the family
+        fields yet, or the satellite's own record already has researched
+        family fields (it is then researched normally).
+        With save=False the provenance is attached for the caller's write.
+        """
+        if FAMILY_REUSE != "on":
+            return None
+        family = family_of(satellite_name)
+        if not family:
+            return None
+        data_type = bot.data_type
+        existing = self.data_manager.get_satellite_data(satellite_name, data_type)
+        if template_score(existing, data_type)[0]:
+            return None
+        found = self.template(family, data_type)
+        if found is None or found[0] == satellite_name:
+            return None
+        source, entry = found
+
+        per_unit = PER_UNIT_FIELDS.get(data_type, [])
+        with get_tracer().span("family", family, data_type=data_type, source=source,
+                               researched_fields=len(per_unit)) as span:
+            data = copy.deepcopy(bot.not_found_output)
+            origins = entry.get("inherited_from", {})
+            inherited_from = {}
+            for field in family_fields(data_type):
+                value = entry["data"].get(field)
+                if not is_placeholder(value):
+                    inherited_from[field] = origins.get(field, source)
+                    data[field] = mark_inherited(field, value, inherited_from[field])
+            if per_unit:
+                updates = FieldRefresher(self.data_manager).refresh(
+                    bot, satellite_name, per_unit, save=False, callbacks=callbacks
+                )
+                if updates is None:
+                    # Nothing new found: keep what the satellite's own record already has
+                    updates = existing.get("data") if existing and isinstance(existing.get("data"), dict) else {}
+                data.update({field: updates[field] for field in per_unit if field in updates})
+            span.set(inherited_fields=len(inherited_from))
+
+        if save:
+            self.data_manager.append_satellite_data(
+                satellite_name, data_type, data, family=family, inherited_from=inherited_from
+            )
+        else:
+            self.data_manager.attach_metadata(
+                satellite_name, data_type, data, family=family, inherited_from=inherited_from
+            )
+        return data
@@ -1,12 +1,21 @@
+import copy
 import os
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_react_agent, Tool, AgentExecutor
+from clients import get_chat_model, search_func, tavily_search_func
+from callbacks import invoke_agent
+from output_parsing import parse_output, OutputParseError
+from single_flight import coalesce
+from langchain.agents import create_react_agent, Tool
+from adaptive_executor import AdaptiveAgentExecutor
 from langchain.prompts import PromptTemplate
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_community.utilities.serpapi import SerpAPIWrapper
+from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 from data_manager import SatelliteDataManager
+from llm_cache import get_llm_cache
+from multi_search import MultiSearch, tavily_results, serpapi_results, duckduckgo_results
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+from schemas import LAUNCH_COST_FIELDS
 
 # Load environment variables
 load_dotenv()
@@ -18,55 +27,81 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 
 # Define response schemas
 response_schemas = [
-    # Launch Cost Information
-    ResponseSchema(name="launch_cost", description="Launch cost in USD"),
-    ResponseSchema(name="launch_cost_source", description="Source URL for launch cost data"),
-    ResponseSchema(name="launch_vehicle", description="Launch vehicle used"),
-    ResponseSchema(name="launch_vehicle_source", description="Source URL for launch vehicle information"),
-    ResponseSchema(name="launch_date", description="Launch date"),
-    ResponseSchema(name="launch_date_source", description="Source URL for launch date information"),
-    ResponseSchema(name="launch_site", description="Launch site"),
-    ResponseSchema(name="launch_site_source", description="Source URL for launch site information"),
-    
-    # Launch Mass
-    ResponseSchema(name="launch_mass", description="JSON object containing max_leo and actual_mass"),
-    ResponseSchema(name="launch_mass_source", description="Source URL for launch mass information"),
-    
-    # Launch Success
-    ResponseSchema(name="launch_success", description="Launch success status (1 for success, 0 for failure)"),
-    ResponseSchema(name="launch_success_source", description="Source URL for launch success information"),
-    
-    # Vehicle Reusability
-    ResponseSchema(name="vehicle_reusability", description="Vehicle reusability status (1 for reusable, 0 for not)"),
-    ResponseSchema(name="reusability_details", description="Details about vehicle reusability"),
-    ResponseSchema(name="reusability_source", description="Source URL for reusability information"),
-    
-    # Mission Cost
-    ResponseSchema(name="mission_cost", description="JSON object containing all cost components"),
-    ResponseSchema(name="mission_cost_source", description="Source URL for mission cost information")
+    ResponseSchema(name=name, description=description) for name, description in LAUNCH_COST_FIELDS
 ]
 
 output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
 format_instructions = output_parser.get_format_instructions()
 
+# Stored when the agent output cannot be parsed
+not_found_output = {
+    "launch_cost": "Not found",
+    "launch_cost_source": "Not found",
+    "launch_vehicle": "Not found",
+    "launch_vehicle_source": "Not found",
+    "launch_date": "Not found",
+    "launch_date_source": "Not found",
+    "launch_site": "Not found",
+    "launch_site_source": "Not found",
+    "launch_mass": {
+        "max_leo": "Not found",
+        "actual_mass": "Not found"
+    },
+    "launch_mass_source": "Not found",
+    "launch_success": "Not found",
+    "launch_success_source": "Not found",
+    "vehicle_reusability": "Not found",
+    "reusability_details": "Not found",
+    "reusability_source": "Not found",
+    "mission_cost": {
+        "overall_cost": "Not found",
+        "vehicle_cost": "Not found",
+        "development_cost": "Not found",
+        "approved_cost": "Not found",
+        "operational_cost": "Not found"
+    },
+    "mission_cost_source": "Not found"
+}
+
 class LaunchCostBot:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
+    data_type = "launch_cost_info"
+    response_schemas = response_schemas
+    not_found_output = not_found_output
+
+    def __init__(self, data_manager=None):
+        self.llm = get_chat_model(
             model="gemini-1.5-flash",
             google_api_key=GOOGLE_API_KEY,
             temperature=0.7,
-            max_output_tokens=4098
+            max_output_tokens=4098,
+            cache=get_llm_cache(),
+            # Retries are handled by the scheduler so they respect provider quotas
+            max_retries=1
         )
         
-        self.data_manager = SatelliteDataManager()
+        self.data_manager = data_manager or SatelliteDataManager()
+        self.agent_executor = None
 
     def get_tools(self):
         search = TavilySearchResults(api_key=TAVILY_API_KEY)
+        serpapi = SerpAPIWrapper(serpapi_api_key=SERPAPI_API_KEY)
+        multi_search = MultiSearch({
+            "tavily": tavily_results(search),
+            "serpapi": serpapi_results(serpapi),
+            "duckduckgo": duckduckgo_results(DuckDuckGoSearchAPIWrapper()),
+        }).as_tool()
+        tavily_run = tavily_search_func(search)
+        tavily_search = Tool(
+            name=search.name,
+            description=search.description,
+            func=tavily_run,
+            verbose=True
+        )
         
         serpapi_search = Tool(
             name="serpapi_search",
             description="Search the web with SerpAPI for more comprehensive information",
-            func=SerpAPIWrapper(serpapi_api_key=SERPAPI_API_KEY).run,
+            func=search_func("serpapi", serpapi.run),
             verbose=True
         )
 
@@ -82,7 +117,7 @@ class LaunchCostBot:
                 "site:satellitetoday.com"
             ]
             enhanced_query = f"{query} ({' OR '.join(specialized_sites)})"
-            return search.run(enhanced_query)
+            return tavily_run(enhanced_query)
 
         space_search_tool = Tool(
             name="space_industry_search",
@@ -101,7 +136,7 @@ class LaunchCostBot:
                 "site:investor.com"
             ]
             enhanced_query = f"{query} cost budget funding ({' OR '.join(financial_sites)})"
-            return search.run(enhanced_query)
+            return tavily_run(enhanced_query)
 
         financial_search_tool = Tool(
             name="financial_search",
@@ -119,7 +154,7 @@ class LaunchCostBot:
                 "site:rocketrundown.com"
             ]
             enhanced_query = f"{query} specifications mass launch vehicle ({' OR '.join(tech_sites)})"
-            return search.run(enhanced_query)
+            return tavily_run(enhanced_query)
 
         tech_search_tool = Tool(
             name="technical_specs_search",
@@ -128,7 +163,7 @@ class LaunchCostBot:
             verbose=True
         )
 
-        return [search, serpapi_search, space_search_tool, financial_search_tool, tech_search_tool]
+        return [multi_search, tavily_search, serpapi_search, space_search_tool, financial_search_tool, tech_search_tool]
 
     def get_prompt_template(self):
         template = """
@@ -185,76 +220,79 @@ class LaunchCostBot:
             input_variables=["input", "tools", "tool_names", "agent_scratchpad", "format_instructions"]
         )
 
-    def process_satellite(self, satellite_name):
-        """Process a satellite and store its launch and cost information"""
-        tools = self.get_tools()
-        prompt = self.get_prompt_template()
-        
-        agent = create_react_agent(
-            self.llm,
-            tools,
-            prompt
-        )
+    def get_agent_executor(self):
+        """Build the tools, prompt and agent executor once; they hold no per-run state"""
+        if self.agent_executor is None:
+            tools = self.get_tools()
+            prompt = self.get_prompt_template()
+
+            agent = create_react_agent(
+                self.llm,
+                tools,
+                prompt
+            )
 
-        agent_executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
-            verbose=True,
-            handle_parsing_errors=True,
-            max_iterations=8,
-            early_stopping_method="force"
+            # Stops early once the observations cover the schema; 8 steps is only the cap
+            self.agent_executor = AdaptiveAgentExecutor(
+                agent=agent,
+                tools=tools,
+                verbose=True,
+                handle_parsing_errors=True,
+                max_iterations=8,
+                schema_fields=[schema.name for schema in response_schemas],
+                early_stopping_method="force"
+            )
+        return self.agent_executor
+
+    def run_agent(self, question, format_instructions, callbacks=None, fields=None):
+        """Run the ReAct agent on a question and return its raw final answer"""
+        agent_executor = self.get_agent_executor()
+        tools = agent_executor.tools
+
+        # Create input dictionary with all expected variables
+        input_dict = {
+            "input": question,
+            "tools": tools,
+            "tool_names": [tool.name for tool in tools],
+            "agent_scratchpad": "",
+            "format_instructions": format_instructions,
+            # Schema keys this run has to fill when it is narrower than the bot's schema
+            "schema_fields": fields or []
+        }
+
+        result = invoke_agent(agent_executor, input_dict, self.data_type, callbacks)
+        return result["output"]
+
+    def process_satellite(self, satellite_name, save=True, callbacks=None):
+        """Process a satellite and store its launch and cost information.
+
+        Concurrent calls for the same satellite, from any session or batch
+        process, share one run (see single_flight.py).
+        """
+        return coalesce(
+            satellite_name, self.data_type, lambda: self._process_satellite(satellite_name, save, callbacks)
         )
 
+    def _process_satellite(self, satellite_name, save, callbacks):
         try:
-            # Create input dictionary with all expected variables
-            input_dict = {
-                "input": f"Find launch and cost information for {satellite_name}",
-                "tools": tools,
-                "tool_names": [tool.name for tool in tools],
-                "agent_scratchpad": "",
-                "format_instructions": format_instructions
-            }
-            
-            result = agent_executor.invoke(input_dict)
+            # Siblings of an already researched constellation member only need their per-unit fields
+            inherited = self.data_manager.get_family_knowledge().research(self, satellite_name, save, callbacks)
+            if inherited is not None:
+                return inherited
+            output = self.run_agent(f"Find launch and cost information for {satellite_name}", format_instructions, callbacks)
             try:
-                parsed_output = output_parser.parse(result["output"])
-            except Exception as parse_error:
+                parsed_output = parse_output(output, output_parser, self.data_type, llm=self.llm)
+            except OutputParseError as parse_error:
                 print(f"Error parsing output: {str(parse_error)}")
-                print("Raw output:", result["output"])
-                parsed_output = {
-                    "launch_cost": "Not found",
-                    "launch_cost_source": "Not found",
-                    "launch_vehicle": "Not found",
-                    "launch_vehicle_source": "Not found",
-                    "launch_date": "Not found",
-                    "launch_date_source": "Not found",
-                    "launch_site": "Not found",
-                    "launch_site_source": "Not found",
-                    "launch_mass": {
-                        "max_leo": "Not found",
-                        "actual_mass": "Not found"
-                    },
-                    "launch_mass_source": "Not found",
-                    "launch_success": "Not found",
-                    "launch_success_source": "Not found",
-                    "vehicle_reusability": "Not found",
-                    "reusability_details": "Not found",
-                    "reusability_source": "Not found",
-                    "mission_cost": {
-                        "overall_cost": "Not found",
-                        "vehicle_cost": "Not found",
-                        "development_cost": "Not found",
-                        "approved_cost": "Not found",
-                        "operational_cost": "Not found"
-                    },
-                    "mission_cost_source": "Not found"
-                }
+                print("Raw output:", output)
+                parsed_output = copy.deepcopy(not_found_output)
             
-            self.data_manager.append_satellite_data(
-                satellite_name,
-                "launch_cost_info",
-                parsed_output
-            )
+            if save:
+                self.data_manager.append_satellite_data(
+                    satellite_name,
+                    self.data_type,
+                    parsed_output
+                )
             return parsed_output
         except Exception as e:
             print(f"Error processing satellite {satellite_name}: {str(e)}")
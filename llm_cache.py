@@ -0,0 +1,66 @@
+import os
+import threading
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from disk_cache import DiskCache
+from tracing import get_tracer
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 20000))
+# "readwrite" (default), "replay" to serve only from the cache, or "off"
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "readwrite")
+
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded response"""
+
+
+class LLMResponseCache(BaseCache):
+    """Content-addressed LangChain cache for chat model responses.
+
+    LangChain passes the full serialized prompt and an `llm_string` that
+    encodes the model name and its parameters (temperature, max tokens, stop
+    sequences), so identical calls hash to the same key. With
+    `replay_only=True` a miss raises instead of calling the model, which lets
+    recorded runs be replayed offline.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=None, replay_only=False):
+        self.store = DiskCache(path, ttl=ttl, max_entries=max_entries)
+        self.replay_only = replay_only
+
+    def lookup(self, prompt, llm_string):
+        hit, value = self.store.get(self.store.make_key(llm_string, prompt))
+        get_tracer().annotate(cache_hit=hit)
+        if hit:
+            return [loads(generation) for generation in value]
+        if self.replay_only:
+            raise LLMCacheMissError("No cached LLM response for this prompt (LLM_CACHE_MODE=replay)")
+        return None
+
+    def update(self, prompt, llm_string, return_val):
+        self.store.set(
+            self.store.make_key(llm_string, prompt),
+            [dumps(generation) for generation in return_val]
+        )
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+    def stats(self):
+        return self.store.stats()
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM cache, or None when LLM_CACHE_MODE=off"""
+    global _llm_cache
+    if LLM_CACHE_MODE == "off":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache(replay_only=LLM_CACHE_MODE == "replay")
+        return _llm_cache
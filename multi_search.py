@@ -0,0 +1,157 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from langchain.agents import Tool
+from scheduler import get_scheduler
+from search_cache import get_search_cache
+from tracing import get_tracer
+
+MULTI_SEARCH_QUORUM = int(os.getenv("MULTI_SEARCH_QUORUM", 2))
+MULTI_SEARCH_BUDGET = float(os.getenv("MULTI_SEARCH_BUDGET", 6.0))
+
+# Shared across calls; stragglers keep running after a quorum returns so
+# their results still land in the search cache
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="multi_search")
+
+
+def tavily_results(search):
+    """Normalized results for a TavilySearchResults tool"""
+    def results(query):
+        return [
+            {"url": r.get("url", ""), "title": r.get("title", ""), "snippet": r.get("content", "")}
+            for r in search.api_wrapper.results(query, search.max_results)
+        ]
+    return results
+
+
+def serpapi_results(wrapper):
+    """Normalized organic results for a SerpAPIWrapper"""
+    def results(query):
+        response = wrapper.results(query)
+        items = []
+        answer = response.get("answer_box") or {}
+        if answer.get("link"):
+            items.append({
+                "url": answer["link"],
+                "title": answer.get("title", ""),
+                "snippet": answer.get("answer") or answer.get("snippet", ""),
+            })
+        for r in response.get("organic_results", []):
+            items.append({"url": r.get("link", ""), "title": r.get("title", ""), "snippet": r.get("snippet", "")})
+        return items
+    return results
+
+
+def duckduckgo_results(wrapper, max_results=5):
+    """Normalized results for a DuckDuckGoSearchAPIWrapper"""
+    def results(query):
+        return [
+            {"url": r.get("link", ""), "title": r.get("title", ""), "snippet": r.get("snippet", "")}
+            for r in wrapper.results(query, max_results)
+        ]
+    return results
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{parts.query}" if parts.query else "")
+
+
+class MultiSearch:
+    """Fan one query out to several search providers and fuse the answers.
+
+    All providers are queried at once; the call returns as soon as `quorum`
+    providers have answered or `budget` seconds have passed, whichever is
+    first. Results are deduplicated by URL and ranked with reciprocal rank
+    fusion, so a page several engines agree on comes first.
+    """
+
+    def __init__(self, providers, quorum=MULTI_SEARCH_QUORUM, budget=MULTI_SEARCH_BUDGET,
+                 max_results=8, snippet_chars=300):
+        cache = get_search_cache()
+        scheduler = get_scheduler()
+        self.providers = {
+            name: cache.wrap(f"{name}_results", scheduler.wrap(name, func))
+            for name, func in providers.items()
+        }
+        self.quorum = min(quorum, len(self.providers))
+        self.budget = budget
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+
+    def _call(self, name, func, query, priority, parent):
+        # Pool threads don't inherit the caller's thread-local priority or span
+        with get_scheduler().priority(priority):
+            with get_tracer().span("search", name, parent=parent, provider=name, query=str(query)[:200]):
+                return func(query)
+
+    def search(self, query):
+        """Return (fused results, names of providers that answered in time)"""
+        priority = get_scheduler().current_priority
+        parent = get_tracer().current()
+        futures = {
+            _pool.submit(self._call, name, func, query, priority, parent): name
+            for name, func in self.providers.items()
+        }
+        deadline = time.monotonic() + self.budget
+        answered = {}
+        pending = set(futures)
+        while pending and len(answered) < self.quorum:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    answered[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"{futures[future]} search failed: {str(e)}")
+        return self.fuse(answered), list(answered)
+
+    def fuse(self, answered, k=60):
+        merged = {}
+        for provider, results in answered.items():
+            for rank, result in enumerate(results or []):
+                url = result.get("url") or ""
+                if not url:
+                    continue
+                key = normalize_url(url)
+                item = merged.setdefault(key, {
+                    "url": url, "title": "", "snippet": "", "providers": [], "score": 0.0
+                })
+                item["score"] += 1.0 / (k + rank + 1)
+                item["providers"].append(provider)
+                if len(result.get("title") or "") > len(item["title"]):
+                    item["title"] = result["title"]
+                if len(result.get("snippet") or "") > len(item["snippet"]):
+                    item["snippet"] = result["snippet"]
+        ranked = sorted(merged.values(), key=lambda item: item["score"], reverse=True)
+        return ranked[:self.max_results]
+
+    def run(self, query):
+        results, providers = self.search(query)
+        if not results:
+            return f"No results from {', '.join(providers) or 'any provider'} for: {query}"
+        lines = []
+        for i, item in enumerate(results, 1):
+            snippet = " ".join(item["snippet"].split())
+            if len(snippet) > self.snippet_chars:
+                snippet = snippet[:self.snippet_chars].rsplit(" ", 1)[0] + "..."
+            lines.append(f"{i}. {item['title']} ({item['url']})\n   {snippet}")
+        return "\n".join(lines)
+
+    def as_tool(self, description=None):
+        return Tool(
+            name="multi_search",
+            description=description or (
+                "Search all web search engines at once and get merged, deduplicated results with "
+                "source URLs. Prefer this over the single-engine search tools."
+            ),
+            func=self.run,
+            verbose=True
+        )
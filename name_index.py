@@ -0,0 +1,113 @@
+import bisect
+import difflib
+import re
+import threading
+from collections import defaultdict
+
+OTHER_GROUP = "Other"
+
+# Letters (words may be separated by spaces or underscores) followed by a number, e.g. STARLINK-1234
+CONSTELLATION_PATTERN = r"^([A-Za-z][A-Za-z]*(?:[ _][A-Za-z]+)*)[- _]?\d"
+
+
+def normalize_name(name):
+    """Lowercase alphanumerics only, so "starlink 1234" finds "STARLINK-1234" """
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def constellation(name):
+    """The family prefix of a numbered satellite name, e.g. STARLINK for STARLINK-1234 or GSAT for GSAT-30.
+
+    Names without a numbered suffix return None.
+    """
+    match = re.match(CONSTELLATION_PATTERN, name.strip())
+    return match.group(1).upper() if match else None
+
+
+class SatelliteNameIndex:
+    """In-memory search index over satellite names for the sidebar picker.
+
+    Keeps the names sorted by normalized form so prefix lookups are a
+    binary search, plus the names of each constellation. Constellations
+    with fewer than `min_group_size` members are folded into "Other".
+    `update` rebuilds only when the set of names has actually changed.
+    """
+
+    def __init__(self, names=(), min_group_size=2):
+        self.min_group_size = min_group_size
+        self.names = []
+        self._key_of = {}
+        self._keys = []
+        self._sorted = []
+        self.groups = {}
+        self._group_of = {}
+        self._lock = threading.Lock()
+        self.update(names)
+
+    def update(self, names):
+        names = list(names)
+        with self._lock:
+            if names == self.names:
+                return False
+            self.names = names
+            self._key_of = {name: normalize_name(name) for name in names}
+            pairs = sorted((key, name) for name, key in self._key_of.items())
+            self._keys = [key for key, _ in pairs]
+            self._sorted = [name for _, name in pairs]
+
+            members = defaultdict(list)
+            for name in names:
+                members[constellation(name)].append(name)
+            groups = defaultdict(list)
+            for prefix, group in members.items():
+                groups[prefix if prefix and len(group) >= self.min_group_size else OTHER_GROUP].extend(group)
+            self.groups = dict(sorted(groups.items(), key=lambda item: (item[0] == OTHER_GROUP, item[0])))
+            self._group_of = {name: group for group, group_names in self.groups.items() for name in group_names}
+            return True
+
+    def group_sizes(self):
+        return {group: len(names) for group, names in self.groups.items()}
+
+    def search(self, query="", group=None, fuzzy_cutoff=0.6, fuzzy_limit=50):
+        """Names matching `query`, best first: prefix matches, then substring matches, or
+        failing both up to `fuzzy_limit` close matches.
+
+        With an empty query, returns all names (of `group` if given) in their
+        stored order.
+        """
+        with self._lock:
+            if group:
+                candidates = self.groups.get(group, [])
+            else:
+                candidates = self.names
+            key = normalize_name(query or "")
+            if not key:
+                return list(candidates)
+
+            results = []
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i].startswith(key):
+                if not group or self._group_of[self._sorted[i]] == group:
+                    results.append(self._sorted[i])
+                i += 1
+            seen = set(results)
+            results.extend(
+                name for name in candidates
+                if name not in seen and key in self._key_of[name]
+            )
+            if not results and len(key) >= 3:
+                # Typo tolerance, only when nothing matched literally since it scans every name
+                by_key = {self._key_of[name]: name for name in candidates}
+                results = [
+                    by_key[match]
+                    for match in difflib.get_close_matches(key, by_key, n=fuzzy_limit, cutoff=fuzzy_cutoff)
+                ]
+            return results
+
+
+def page(items, page_number, page_size):
+    """Return (items on the 1-based page, number of pages), clamping the page number"""
+    pages = max(1, -(-len(items) // page_size))
+    page_number = min(max(1, page_number), pages)
+    start = (page_number - 1) * page_size
+    return items[start:start + page_size], pages
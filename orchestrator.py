@@ -0,0 +1,87 @@
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Module and class of the bot for each data type, in the order the UI presents
+# them. Bots are imported on first use because they pull in the whole
+# LangChain stack, which the UI does not need just to browse stored data.
+BOT_CLASSES = {
+    "basic_info": ("basic_info_bot", "BasicInfoBot"),
+    "technical_specs": ("technical_specs_bot", "TechnicalSpecsBot"),
+    "launch_cost_info": ("launch_cost_bot", "LaunchCostBot"),
+}
+UNIFIED_BOT_CLASS = ("unified_research_bot", "UnifiedResearchBot")
+
+DATA_TYPE_LABELS = {
+    "basic_info": "Basic Information",
+    "technical_specs": "Technical Specifications",
+    "launch_cost_info": "Launch and Cost Information",
+}
+
+
+def bot_class(data_type):
+    """Import and return the bot class for a data type, or the unified bot for "unified" """
+    module_name, class_name = UNIFIED_BOT_CLASS if data_type == "unified" else BOT_CLASSES[data_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def gather_all(satellite_name, data_manager, data_types=None, on_progress=None, poll_interval=0.5,
+               log_handlers=None, bots=None):
+    """Run the research agents for one satellite in parallel and store the results together.
+
+    Each agent runs on its own worker thread with saving disabled; the results
+    are written with a single storage commit once all agents have finished, so
+    wall-clock time is close to the slowest agent rather than the sum.
+
+    `on_progress(data_type, state, elapsed, result)` is called from the
+    calling thread (so it may update Streamlit elements) with state
+    "running" on every poll, then "done" or "failed". `log_handlers` maps
+    data types to a LangChain callback handler for that agent's run. `bots`
+    maps data types to already-built bots to reuse; missing ones are created.
+    """
+    data_types = list(data_types or BOT_CLASSES)
+    log_handlers = log_handlers or {}
+    bots = {
+        data_type: (bots or {}).get(data_type) or bot_class(data_type)(data_manager=data_manager)
+        for data_type in data_types
+    }
+    results = {}
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=len(bots), thread_name_prefix="agent") as pool:
+        pending = {
+            pool.submit(
+                bot.process_satellite, satellite_name, save=False,
+                callbacks=[log_handlers[data_type]] if data_type in log_handlers else None
+            ): data_type
+            for data_type, bot in bots.items()
+        }
+        while pending:
+            finished, _ = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            elapsed = time.monotonic() - started
+            for future in finished:
+                data_type = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error running {data_type} agent for {satellite_name}: {str(e)}")
+                    result = None
+                results[data_type] = result
+                if on_progress:
+                    on_progress(data_type, "done" if result else "failed", elapsed, result)
+            if on_progress:
+                for data_type in pending.values():
+                    on_progress(data_type, "running", elapsed, None)
+
+    data_manager.append_many_satellite_data(
+        (satellite_name, data_type, result)
+        for data_type, result in results.items()
+        if result
+    )
+    return results
+
+
+def gather_unified(satellite_name, data_manager, data_types=None, callbacks=None, bot=None):
+    """Fill the requested data types from one shared research pass and store them together"""
+    bot = bot or bot_class("unified")(data_manager=data_manager)
+    return bot.process_satellite(satellite_name, data_types=list(data_types or BOT_CLASSES), callbacks=callbacks)
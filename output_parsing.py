@@ -0,0 +1,229 @@
+"""Tolerant parsing of the agents' final answers into their response schemas.
+
+A run's answer is tried in increasing order of cost:
+
+1. strict: the JSON object in the answer (inside a ```json fence if there is
+   one) loads as is and has every schema key
+2. repair: fences and trailing prose are dropped, trailing commas removed and
+   a truncated object is cut back to its last complete value and closed
+3. reformat: one LLM call that only reformats the raw answer into the schema,
+   for answers from which no JSON could be read at all (prose, or objects
+   too damaged to repair); a partly repaired object is not sent, as its
+   missing keys are not in the answer either
+
+Keys that no stage recovers are filled with "Not found", so a partly
+readable answer keeps what it has instead of being thrown away. Every parse
+is traced as a "parse" span and counted per bot and stage (`parse_stats`).
+"""
+import ast
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from tracing import get_tracer
+
+NOT_FOUND = "Not found"
+
+# Set to "off" to never spend an LLM call on reformatting an answer
+OUTPUT_REFORMAT = os.getenv("OUTPUT_REFORMAT", "on")
+
+# Answers AgentExecutor returns when a run hits its limits; there is nothing to reformat
+STOPPED_MARKER = "Agent stopped due to"
+
+REFORMAT_PROMPT = """Reformat the text below into the requested output format. This is a reformatting task only:
+copy the values that the text states, do not research, guess or add anything, and use "Not found" for
+anything the text does not state.
+
+{format_instructions}
+
+Text:
+{text}
+"""
+
+STAGES = ["strict", "repair", "reformat", "failed"]
+
+_stats = defaultdict(lambda: {"attempts": 0, "stages": defaultdict(int), "fields_expected": 0, "fields_recovered": 0})
+_stats_lock = threading.Lock()
+
+
+class OutputParseError(ValueError):
+    """No stage could read anything from an answer"""
+
+
+def strip_answer(text):
+    """The answer body: text after "Final Answer:", inside the first ``` fence if there is one"""
+    text = text.split("Final Answer:", 1)[-1]
+    fence = re.search(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", text, re.DOTALL)
+    return fence.group(1) if fence else text
+
+
+def strict_json(text):
+    """The object between the first "{" and the last "}", loaded with json.loads"""
+    body = strip_answer(text)
+    start, end = body.find("{"), body.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        value = json.loads(body[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _load(candidate):
+    candidate = re.sub(r",\s*([}\]])", r"\1", candidate)
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        pass
+    try:
+        # Python-style dicts ('single quotes', True/None) are a common near miss
+        return ast.literal_eval(candidate)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def repair_json(text, max_attempts=20):
+    """Recover an object from a damaged answer, or None.
+
+    Scans from the first "{", stopping where that object closes so trailing
+    prose is ignored. If the answer is truncated, the object is cut back to
+    the last complete member (the last "," seen) and its open brackets are
+    closed; a few earlier cut points are tried in case the last one is
+    inside a damaged value.
+    """
+    body = strip_answer(text)
+    start = body.find("{")
+    if start == -1:
+        return None
+    stack = []
+    cuts = []
+    in_string = escaped = False
+    end = None
+    for i in range(start, len(body)):
+        char = body[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == stack[-1][1]:
+                in_string = False
+                stack.pop()
+            continue
+        if char in "\"'":
+            in_string = True
+            stack.append(("string", char))
+        elif char in "{[":
+            stack.append(("bracket", "}" if char == "{" else "]"))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = i + 1
+                break
+        elif char == ",":
+            cuts.append((i, "".join(closer for _, closer in reversed(stack))))
+
+    if end is not None:
+        value = _load(body[start:end])
+        if isinstance(value, dict):
+            return value
+    # Truncated (or broken) object: close it at the end, then at the last commas
+    candidates = []
+    if end is None and not in_string and not body.rstrip().endswith((":", ",")):
+        candidates.append(body[start:].rstrip() + "".join(closer for _, closer in reversed(stack)))
+    candidates.extend(body[start:i] + closers for i, closers in reversed(cuts))
+    for candidate in candidates[:max_attempts]:
+        value = _load(candidate)
+        if isinstance(value, dict) and value:
+            return value
+    return None
+
+
+def complete(value, keys):
+    """Schema keys of `value`, with "Not found" for missing ones; returns (data, recovered count)"""
+    data = {key: value[key] if key in value and value[key] is not None else NOT_FOUND for key in keys}
+    recovered = sum(1 for key in keys if data[key] != NOT_FOUND)
+    return data, recovered
+
+
+def reformat(llm, text, format_instructions):
+    """Ask the model to reformat a raw answer; returns the parsed object or None"""
+    response = llm.invoke(REFORMAT_PROMPT.format(format_instructions=format_instructions, text=text))
+    content = getattr(response, "content", response)
+    return strict_json(content) or repair_json(content)
+
+
+def record(name, stage, expected, recovered):
+    with _stats_lock:
+        stats = _stats[name]
+        stats["attempts"] += 1
+        stats["stages"][stage] += 1
+        stats["fields_expected"] += expected
+        stats["fields_recovered"] += recovered
+
+
+def parse_stats(reset=False):
+    """Per bot: parse attempts, how many each stage settled, and the share of schema fields recovered"""
+    with _stats_lock:
+        stats = {
+            name: {
+                "attempts": values["attempts"],
+                "stages": {stage: values["stages"].get(stage, 0) for stage in STAGES},
+                "field_recovery_rate": (values["fields_recovered"] / values["fields_expected"]
+                                        if values["fields_expected"] else 0.0),
+            }
+            for name, values in _stats.items()
+        }
+        if reset:
+            _stats.clear()
+        return stats
+
+
+def parse_output(text, output_parser, name, llm=None):
+    """Parse an agent's answer into the keys of `output_parser`'s response schemas.
+
+    Stops at the first stage that yields every key; repair only fills the
+    keys strict parsing could not read, and keys no stage reads are set to
+    "Not found". The stage recorded for the parse is the first one that
+    read anything. The reformat stage runs only when `llm` is given,
+    OUTPUT_REFORMAT is not "off" and no JSON could be read at all: when
+    repair recovers part of an object, the rest is missing from the answer
+    and reformatting cannot bring it back.
+    Raises OutputParseError if no stage recovers anything.
+    """
+    keys = [schema.name for schema in output_parser.response_schemas]
+    text = text or ""
+    with get_tracer().span("parse", name, chars=len(text)) as span:
+        found = {}
+        settled_by = "failed"
+        stages = [("strict", lambda: strict_json(text)), ("repair", lambda: repair_json(text))]
+        if llm is not None and OUTPUT_REFORMAT != "off" and text.strip() and not text.lstrip().startswith(STOPPED_MARKER):
+            stages.append(("reformat", lambda: reformat(llm, text, output_parser.get_format_instructions())))
+        for stage, attempt in stages:
+            if stage == "reformat" and found:
+                break
+            try:
+                value = attempt()
+            except Exception as e:
+                print(f"Error in {stage} parsing for {name}: {str(e)}")
+                value = None
+            if not isinstance(value, dict):
+                continue
+            # Keys a cheaper stage already read are kept; an explicit "Not found" counts as read
+            added = {key: value[key] for key in keys if key in value and key not in found}
+            if added:
+                found.update(added)
+                if settled_by == "failed":
+                    settled_by = stage
+            if len(found) == len(keys):
+                break
+
+        data, recovered = complete(found, keys)
+        span.set(stage=settled_by, fields_expected=len(keys), fields_recovered=recovered)
+        record(name, settled_by, len(keys), recovered)
+        if not found:
+            raise OutputParseError(f"Could not parse {name} output ({len(text)} chars)")
+        return data
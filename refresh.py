@@ -0,0 +1,158 @@
+import copy
+from datetime import datetime, timedelta
+from output_parsing import parse_output
+from schemas import field_names
+
+PLACEHOLDER_VALUES = {"", "not found", "n/a", "na", "unknown", "none", "null", "not available", "-"}
+
+
+def is_placeholder(value):
+    """True for "Not found"-style values; a nested object is a placeholder if all its values are"""
+    if value is None:
+        return True
+    if isinstance(value, dict):
+        return not value or all(is_placeholder(v) for v in value.values())
+    return str(value).strip().lower() in PLACEHOLDER_VALUES
+
+
+def field_groups(fields):
+    """Group schema fields with the *_source field that follows them.
+
+    The bots' schemas list each value right before its source URL, e.g.
+    vehicle_reusability, reusability_details, reusability_source, so a group
+    is refreshed as a unit and values never end up with a stale source.
+    """
+    groups, current = [], []
+    for field in fields:
+        current.append(field)
+        if field.endswith("_source"):
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FieldRefresher:
+    """Re-researches only the fields of a stored record that are missing or stale.
+
+    A field is stale when its value is a placeholder or, with `max_age`, when
+    it was last updated longer ago than that. Per-field timestamps are kept
+    in the record's `field_updated` map (falling back to `last_updated`), so
+    refreshing some fields does not make the others look fresh.
+    """
+
+    def __init__(self, data_manager, max_age=None):
+        self.data_manager = data_manager
+        self.max_age = timedelta(days=max_age) if isinstance(max_age, (int, float)) else max_age
+
+    def field_timestamps(self, entry, fields):
+        field_updated = entry.get("field_updated", {})
+        return {field: field_updated.get(field, entry.get("last_updated")) for field in fields}
+
+    def stale_fields(self, satellite_name, data_type, now=None):
+        """Return the schema fields of `data_type` that need research, in schema order"""
+        fields = field_names(data_type)
+        entry = self.data_manager.get_satellite_data(satellite_name, data_type)
+        if not entry or not isinstance(entry.get("data"), dict):
+            return fields
+
+        data = entry["data"]
+        timestamps = self.field_timestamps(entry, fields)
+        now = now or datetime.now()
+        stale = set()
+        for group in field_groups(fields):
+            for field in group:
+                updated = parse_timestamp(timestamps[field])
+                too_old = self.max_age is not None and (updated is None or now - updated > self.max_age)
+                if is_placeholder(data.get(field)) or too_old:
+                    stale.update(group)
+                    break
+        return [field for field in fields if field in stale]
+
+    def build_question(self, satellite_name, fields, existing):
+        known = {
+            key: value for key, value in existing.items()
+            if key not in fields and not is_placeholder(value)
+        }
+        question = (
+            f"Find ONLY the following fields for {satellite_name}: {', '.join(fields)}. "
+            f"All other fields are already known. In the Final Answer, respond in JSON with only these keys: "
+            f"{', '.join(fields)}."
+        )
+        if known:
+            context = "; ".join(f"{key}: {value}" for key, value in list(known.items())[:8])
+            question += f" Known facts that may help the search: {context}"
+        return question
+
+    def merge(self, existing, updates):
+        merged = copy.deepcopy(existing)
+        changed = []
+        for field, value in updates.items():
+            if is_placeholder(value):
+                continue
+            if isinstance(value, dict) and isinstance(merged.get(field), dict):
+                for key, sub_value in value.items():
+                    if not is_placeholder(sub_value):
+                        merged[field][key] = sub_value
+            else:
+                merged[field] = value
+            changed.append(field)
+        return merged, changed
+
+    def refresh(self, bot, satellite_name, fields=None, save=True, callbacks=None):
+        """Research `fields` (default: the stale ones) and merge them into the stored record.
+
+        Returns the merged data, or None if nothing needed refreshing, the
+        agent run failed or it found no new values; the record is then left
+        untouched, so its timestamps still show when it was last changed.
+        Found values never get overwritten with "Not found", and fields that
+        get researched lose their `inherited_from` entry.
+        """
+        # Only needed once a refresh actually runs, so browsing stays free of LangChain
+        from langchain.output_parsers import StructuredOutputParser
+
+        fields = fields or self.stale_fields(satellite_name, bot.data_type)
+        if not fields:
+            return None
+
+        entry = self.data_manager.get_satellite_data(satellite_name, bot.data_type) or {}
+        existing = entry.get("data") if isinstance(entry.get("data"), dict) else copy.deepcopy(bot.not_found_output)
+        schemas = [schema for schema in bot.response_schemas if schema.name in fields]
+        parser = StructuredOutputParser.from_response_schemas(schemas)
+
+        try:
+            output = bot.run_agent(
+                self.build_question(satellite_name, fields, existing),
+                parser.get_format_instructions(),
+                callbacks,
+                fields=fields
+            )
+            updates = parse_output(output, parser, bot.data_type, llm=bot.llm)
+        except Exception as e:
+            print(f"Error refreshing {', '.join(fields)} for {satellite_name}: {str(e)}")
+            return None
+
+        merged, changed = self.merge(existing, {field: updates.get(field) for field in fields})
+        if not changed:
+            return None
+        if save:
+            all_fields = field_names(bot.data_type)
+            field_updated = self.field_timestamps(entry, all_fields) if entry else {}
+            now = datetime.now().isoformat()
+            field_updated.update({field: now for field in changed})
+            metadata = {"field_updated": field_updated}
+            if entry.get("inherited_from"):
+                inherited_from = {
+                    field: source for field, source in entry["inherited_from"].items() if field not in changed
+                }
+                metadata.update(family=entry.get("family"), inherited_from=inherited_from)
+            self.data_manager.append_satellite_data(satellite_name, bot.data_type, merged, **metadata)
+        return merged
@@ -0,0 +1,185 @@
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from tracing import get_tracer
+
+# Lower values are admitted first
+INTERACTIVE = 0
+BATCH = 10
+
+# Requests per minute and concurrent calls per provider; override with
+# SCHEDULER_<PROVIDER>_RPM and SCHEDULER_<PROVIDER>_CONCURRENCY
+DEFAULT_LIMITS = {
+    "gemini": {"rpm": 15, "concurrency": 4},
+    "tavily": {"rpm": 60, "concurrency": 4},
+    "serpapi": {"rpm": 30, "concurrency": 2},
+    "duckduckgo": {"rpm": 20, "concurrency": 2},
+}
+FALLBACK_LIMITS = {"rpm": 60, "concurrency": 4}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_MESSAGE = re.compile(
+    r"\b(429|500|502|503|504)\b|rate.?limit|quota|resource.?exhausted|too many requests|"
+    r"temporarily unavailable|ratelimit",
+    re.IGNORECASE
+)
+
+
+def is_retryable(error):
+    """True for rate-limit (429) and server (5xx) errors from any provider client"""
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        try:
+            if int(status) in RETRYABLE_STATUS:
+                return True
+        except (TypeError, ValueError):
+            pass
+    return bool(RETRYABLE_MESSAGE.search(str(error)))
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class ProviderLimiter:
+    """Admits calls to one provider in priority order within its rate and concurrency limits"""
+
+    def __init__(self, name, rpm, concurrency):
+        self.name = name
+        self.max_concurrency = concurrency
+        # A burst of a few seconds' worth of requests, never more than the concurrency
+        self.bucket = TokenBucket(rpm / 60.0, max(1, min(concurrency, rpm / 60.0 * 5)))
+        self.active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority):
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] == ticket and self.active < self.max_concurrency:
+                        delay = self.bucket.wait_time()
+                        if delay <= 0:
+                            self.bucket.take()
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+
+class Scheduler:
+    """Central gate for every LLM and search call.
+
+    Each provider gets a token bucket and a concurrency cap; waiting callers
+    are admitted by priority (interactive UI requests before batch jobs) and
+    then arrival order. Rate-limit and server errors are retried with
+    exponential backoff and jitter, releasing the slot while backing off.
+    Limits are per process.
+    """
+
+    def __init__(self, limits=None, max_retries=4, base_delay=1.0, max_delay=60.0):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def limiter(self, provider):
+        with self._lock:
+            if provider not in self._limiters:
+                limits = dict(DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS))
+                limits.update(self.limits.get(provider, {}))
+                prefix = f"SCHEDULER_{provider.upper()}"
+                rpm = float(os.getenv(f"{prefix}_RPM", limits["rpm"]))
+                concurrency = int(os.getenv(f"{prefix}_CONCURRENCY", limits["concurrency"]))
+                self._limiters[provider] = ProviderLimiter(provider, rpm, concurrency)
+            return self._limiters[provider]
+
+    @property
+    def current_priority(self):
+        return getattr(self._local, "priority", INTERACTIVE)
+
+    @contextmanager
+    def priority(self, priority):
+        """Run the calls made by this thread inside the block at the given priority"""
+        previous = self.current_priority
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def call(self, provider, func, *args, **kwargs):
+        limiter = self.limiter(provider)
+        queued = 0.0
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            limiter.acquire(self.current_priority)
+            queued += time.monotonic() - started
+            get_tracer().annotate(queue_ms=queued * 1000, attempts=attempt + 1)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"{provider} call failed ({str(e)[:100]}), retrying in {delay:.1f}s")
+            finally:
+                limiter.release()
+            time.sleep(delay)
+
+    def wrap(self, provider, func):
+        def scheduled(*args, **kwargs):
+            return self.call(provider, func, *args, **kwargs)
+
+        scheduled.__name__ = getattr(func, "__name__", f"{provider}_call")
+        return scheduled
+
+
+_scheduler = Scheduler()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler"""
+    return _scheduler
@@ -0,0 +1,88 @@
+"""Field definitions for each data type, as (name, description) pairs in schema order.
+
+Kept free of LangChain so the UI can work with stored records without
+loading the agent stack; the bots build their ResponseSchemas from these.
+"""
+
+BASIC_INFO_FIELDS = [
+    # Basic Information
+    ("altitude", "Satellite altitude in kilometers"),
+    ("altitude_source", "Source URL for altitude data"),
+    ("orbital_life_years", "Orbital life in years"),
+    ("orbital_life_source", "Source URL for orbital life data"),
+    ("launch_orbit_classification", "ISRO orbit classification (GTO, LEO, or SSO)"),
+    ("orbit_classification_source", "Source URL for orbit classification"),
+    ("number_of_payloads", "Number of payloads on the satellite"),
+    ("payloads_source", "Source URL for payload information"),
+]
+
+TECHNICAL_SPECS_FIELDS = [
+    # Satellite Type
+    ("satellite_type", "Type of satellite (Communication/ Earth Observation / Experimental / Navigation / Science & Exploration)"),
+    ("satellite_type_source", "Source URL for satellite type"),
+
+    # Satellite Application
+    ("satellite_application", "Detailed description of satellite application"),
+    ("application_source", "Source URL for satellite application"),
+
+    # Sensor Specifications
+    ("sensor_specs", "JSON object containing spectral_bands and spatial_resolution"),
+    ("sensor_specs_source", "Source URL for sensor specifications"),
+
+    # Technological Breakthroughs
+    ("technological_breakthroughs", "Notable technological breakthroughs"),
+    ("breakthrough_source", "Source URL for breakthrough information"),
+]
+
+LAUNCH_COST_FIELDS = [
+    # Launch Cost Information
+    ("launch_cost", "Launch cost in USD"),
+    ("launch_cost_source", "Source URL for launch cost data"),
+    ("launch_vehicle", "Launch vehicle used"),
+    ("launch_vehicle_source", "Source URL for launch vehicle information"),
+    ("launch_date", "Launch date"),
+    ("launch_date_source", "Source URL for launch date information"),
+    ("launch_site", "Launch site"),
+    ("launch_site_source", "Source URL for launch site information"),
+
+    # Launch Mass
+    ("launch_mass", "JSON object containing max_leo and actual_mass"),
+    ("launch_mass_source", "Source URL for launch mass information"),
+
+    # Launch Success
+    ("launch_success", "Launch success status (1 for success, 0 for failure)"),
+    ("launch_success_source", "Source URL for launch success information"),
+
+    # Vehicle Reusability
+    ("vehicle_reusability", "Vehicle reusability status (1 for reusable, 0 for not)"),
+    ("reusability_details", "Details about vehicle reusability"),
+    ("reusability_source", "Source URL for reusability information"),
+
+    # Mission Cost
+    ("mission_cost", "JSON object containing all cost components"),
+    ("mission_cost_source", "Source URL for mission cost information"),
+]
+
+FIELDS = {
+    "basic_info": BASIC_INFO_FIELDS,
+    "technical_specs": TECHNICAL_SPECS_FIELDS,
+    "launch_cost_info": LAUNCH_COST_FIELDS,
+}
+
+
+def field_names(data_type):
+    return [name for name, _ in FIELDS[data_type]]
+
+
+# Fields that differ between members of a constellation: each unit's own orbit and launch.
+# Everything else describes the satellite model or programme and is shared (see families.py).
+PER_UNIT_FIELDS = {
+    "basic_info": ["altitude", "altitude_source"],
+    "technical_specs": [],
+    "launch_cost_info": [
+        "launch_cost", "launch_cost_source",
+        "launch_date", "launch_date_source",
+        "launch_site", "launch_site_source",
+        "launch_success", "launch_success_source",
+    ],
+}
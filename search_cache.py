@@ -0,0 +1,50 @@
+import os
+import threading
+from disk_cache import DiskCache
+from tracing import get_tracer
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "search_cache.db")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 7 * 24 * 3600))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+
+
+def normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+
+class SearchCache(DiskCache):
+    """Disk cache for web search results shared by every bot's tools"""
+
+    def wrap(self, provider, func):
+        """Wrap a search function so repeated (provider, query) pairs are served from disk"""
+        def cached_search(query):
+            key = self.make_key(provider, normalize_query(query))
+            hit, value = self.get(key)
+            get_tracer().annotate(cache_hit=hit)
+            if hit:
+                return value
+            result = func(query)
+            # Empty results are usually transient provider errors, so don't pin them
+            if result:
+                self.set(key, result)
+            return result
+
+        cached_search.__name__ = getattr(func, "__name__", f"{provider}_search")
+        return cached_search
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide search cache"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                SEARCH_CACHE_PATH,
+                ttl=SEARCH_CACHE_TTL,
+                max_entries=SEARCH_CACHE_MAX_ENTRIES
+            )
+        return _search_cache
@@ -0,0 +1,172 @@
+import heapq
+import re
+import threading
+from columnar import flatten
+
+# Words, numbers, and dotted names such as skyrocket.de or 30.5
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+# field:term in a query, e.g. satellite_application:sar or source:skyrocket.de
+QUALIFIED_PATTERN = re.compile(r"^(\w+):(.+)$")
+
+
+def is_source_field(field):
+    return field.endswith("source") or field.endswith("reference")
+
+
+def tokens(text):
+    """Index terms of a value: lowercased words, plus for dotted names like
+    space.skyrocket.de the parent domains (skyrocket.de) and the single labels"""
+    terms = set()
+    for token in TOKEN_PATTERN.findall(str(text).lower()):
+        terms.add(token)
+        if "." in token:
+            labels = token.split(".")
+            terms.update(label for label in labels if label)
+            if labels[-1].isalpha():
+                terms.update(".".join(labels[i:]) for i in range(1, len(labels) - 1))
+    return terms
+
+
+def field_matches(field, qualifier):
+    if qualifier == "source":
+        return is_source_field(field)
+    return field == qualifier or field.startswith(qualifier + "_")
+
+
+class SearchIndex:
+    """Inverted index from terms to the satellites whose stored text contains them.
+
+    Covers every text value and source URL of every record, with nested
+    objects flattened to <field>_<key>. Each term keeps the set of matching
+    satellites overall and per field, so a lookup is a C-level intersection
+    of a few sets whose cost follows the number of matches rather than the
+    catalogue size. The index is built on first use and then follows the
+    data manager's change notifications, re-indexing only the records that
+    were written or deleted.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self._postings = {}
+        self._field_postings = {}
+        self._doc_terms = {}
+        self._types_of = {}
+        self._dirty = set()
+        self._built = False
+        self._lock = threading.RLock()
+        data_manager.add_listener(self._on_change)
+
+    def _on_change(self, changes):
+        with self._lock:
+            if changes is None:
+                self._built = False
+                self._dirty.clear()
+                return
+            if self._built:
+                self._dirty.update(changes)
+
+    def _ensure_current(self):
+        if not self._built:
+            self._postings = {}
+            self._field_postings = {}
+            self._doc_terms = {}
+            self._types_of = {}
+            self._dirty.clear()
+            for satellite_name, data_type, entry in self.data_manager.iter_records():
+                self._add(satellite_name, data_type, entry)
+            self._built = True
+            return
+        dirty, self._dirty = self._dirty, set()
+        for satellite_name, data_type in dirty:
+            if data_type is None:
+                # The whole satellite changed (or was deleted): what was indexed plus what is stored now
+                stored = self.data_manager.get_satellite_data(satellite_name) or {}
+                data_types = self._types_of.get(satellite_name, set()) | set(stored)
+            else:
+                data_types = [data_type]
+            for dtype in data_types:
+                self._remove(satellite_name, dtype)
+                entry = self.data_manager.get_satellite_data(satellite_name, dtype)
+                if entry:
+                    self._add(satellite_name, dtype, entry)
+
+    def _add(self, satellite_name, data_type, entry):
+        data = entry.get("data")
+        fields = flatten(data) if isinstance(data, dict) else {"value": data}
+        doc_terms = {}
+        for field, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = " ".join(str(item) for item in value)
+            for term in tokens(value):
+                doc_terms.setdefault(term, []).append(field)
+                self._field_postings.setdefault(term, {}).setdefault(field, set()).add(satellite_name)
+        for term in doc_terms:
+            self._postings.setdefault(term, set()).add(satellite_name)
+        self._doc_terms[(satellite_name, data_type)] = doc_terms
+        self._types_of.setdefault(satellite_name, set()).add(data_type)
+
+    def _remove(self, satellite_name, data_type):
+        doc_terms = self._doc_terms.pop((satellite_name, data_type), None)
+        types = self._types_of.get(satellite_name, set())
+        types.discard(data_type)
+        if not types:
+            self._types_of.pop(satellite_name, None)
+        if not doc_terms:
+            return
+        for term, fields in doc_terms.items():
+            by_field = self._field_postings.get(term, {})
+            for field in fields:
+                by_field.get(field, set()).discard(satellite_name)
+                if not by_field.get(field, True):
+                    del by_field[field]
+            if not by_field:
+                self._field_postings.pop(term, None)
+            # Field names are unique across data types, but a term can also appear under another type
+            if not any(term in self._doc_terms.get((satellite_name, other), ()) for other in types):
+                posting = self._postings.get(term, set())
+                posting.discard(satellite_name)
+                if not posting:
+                    self._postings.pop(term, None)
+
+    def _matching(self, qualifier, term):
+        if qualifier is None:
+            return self._postings.get(term, set())
+        matches = [
+            satellites for field, satellites in self._field_postings.get(term, {}).items()
+            if field_matches(field, qualifier)
+        ]
+        return set().union(*matches)
+
+    def _matched_fields(self, satellite_name, clauses):
+        fields = set()
+        for data_type in self._types_of.get(satellite_name, ()):
+            doc_terms = self._doc_terms[(satellite_name, data_type)]
+            for qualifier, term in clauses:
+                fields.update(
+                    field for field in doc_terms.get(term, ())
+                    if qualifier is None or field_matches(field, qualifier)
+                )
+        return sorted(fields)
+
+    def search(self, query, limit=None):
+        """Satellites matching every term of `query`, as (satellite_name, matched fields) sorted by name.
+
+        Terms can be limited to a field with field:term (satellite_application:sar);
+        the field "source" means any source URL (source:skyrocket.de).
+        """
+        clauses = []
+        for part in query.split():
+            match = QUALIFIED_PATTERN.match(part)
+            qualifier, text = (match.group(1).lower(), match.group(2)) if match else (None, part)
+            clauses.extend((qualifier, term) for term in TOKEN_PATTERN.findall(text.lower()))
+        if not clauses:
+            return []
+
+        with self._lock:
+            self._ensure_current()
+            sets = sorted((self._matching(qualifier, term) for qualifier, term in clauses), key=len)
+            satellites = sets[0].intersection(*sets[1:])
+            names = heapq.nsmallest(limit, satellites) if limit else sorted(satellites)
+            return [(name, self._matched_fields(name, clauses)) for name in names]
@@ -0,0 +1,182 @@
+"""Single-flight research: concurrent requests for the same satellite share one agent run.
+
+Two Streamlit sessions, or a session and a batch job, asking for the same
+(satellite, data type) at the same time would otherwise both run the agent
+and the later write would overwrite the earlier one. The first caller
+becomes the leader and runs; the others wait and get its result.
+
+Within a process, callers wait on the leader's thread. Across processes,
+the leader holds a lease row in a small SQLite database (`single_flight.db`)
+and publishes its result there when it finishes; waiting processes poll the
+row. A lease whose owner died (same host, process gone) or that is older
+than SINGLE_FLIGHT_LEASE seconds is taken over, so a crashed run never
+blocks a satellite for good.
+
+Followers return the leader's result without storing it again: the leader
+stores it, or the caller that ran it with save=False does.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from tracing import get_tracer
+
+# "process" coalesces only within this process, "off" disables coalescing
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "on")
+SINGLE_FLIGHT_PATH = os.getenv("SINGLE_FLIGHT_PATH", "single_flight.db")
+# Seconds a leader may hold a key before other processes take it over
+SINGLE_FLIGHT_LEASE = float(os.getenv("SINGLE_FLIGHT_LEASE", 900))
+# Seconds between checks of another process's lease
+SINGLE_FLIGHT_POLL = float(os.getenv("SINGLE_FLIGHT_POLL", 0.5))
+# Finished rows older than this are deleted; they only serve followers that were already waiting
+RESULT_TTL = 300
+
+
+def owner_alive(owner):
+    """False only when `owner` ("host:pid:...") is a process on this host that no longer exists"""
+    host, pid, _ = owner.split(":", 2)
+    if host != socket.gethostname() or os.name != "posix":
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Runs a function once per key among concurrent callers, in this process and, with `path`, across processes.
+
+    `run(key, fn)` returns fn's result to the leader and to every caller that
+    asked for the same key while it ran. If the leader raises, it re-raises,
+    callers waiting in this process get None and another process waiting
+    on the lease runs fn itself.
+    """
+
+    def __init__(self, path=None, lease=SINGLE_FLIGHT_LEASE, poll_interval=SINGLE_FLIGHT_POLL):
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self.leaders = 0
+        self.followers = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path:
+            self._connect().execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, status TEXT NOT NULL, "
+                "started_at REAL NOT NULL, finished_at REAL, result TEXT)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def run(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            with get_tracer().span("single_flight", "/".join(key), role="follower", scope="process"):
+                flight.done.wait()
+            return flight.result
+        try:
+            flight.result = self._run_leased("/".join(key), fn) if self.path else fn()
+            return flight.result
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _claim(self, conn, key, asked_at):
+        """Take the lease on `key`, or return the row of the process holding it"""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM flights WHERE status = 'done' AND finished_at < ?", (now - RESULT_TTL,))
+            row = conn.execute(
+                "SELECT owner, status, started_at, finished_at, result FROM flights WHERE key = ?", (key,)
+            ).fetchone()
+            free = (
+                row is None
+                # Finished before we asked: a new request, not one to share
+                or (row[1] == "done" and row[3] < asked_at)
+                or (row[1] == "running" and (now - row[2] > self.lease or not owner_alive(row[0])))
+            )
+            if free:
+                conn.execute(
+                    "INSERT OR REPLACE INTO flights (key, owner, status, started_at, finished_at, result) "
+                    "VALUES (?, ?, 'running', ?, NULL, NULL)",
+                    (key, self.owner, now)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return free, row
+
+    def _run_leased(self, key, fn):
+        conn = self._connect()
+        asked_at = time.time()
+        free, row = self._claim(conn, key, asked_at)
+        if not free:
+            with get_tracer().span("single_flight", key, role="follower", scope="cross-process", leader=row[0]):
+                while not free:
+                    if row[1] == "done":
+                        return json.loads(row[4]) if row[4] else None
+                    time.sleep(self.poll_interval)
+                    free, row = self._claim(conn, key, asked_at)
+            # The leader died or its lease expired: this process runs instead
+
+        try:
+            result = fn()
+        except BaseException:
+            conn.execute("DELETE FROM flights WHERE key = ? AND owner = ?", (key, self.owner))
+            raise
+        conn.execute(
+            "UPDATE flights SET status = 'done', finished_at = ?, result = ? WHERE key = ? AND owner = ?",
+            (time.time(), json.dumps(result, default=str), key, self.owner)
+        )
+        return result
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight():
+    """Return the process-wide SingleFlight configured by SINGLE_FLIGHT and SINGLE_FLIGHT_PATH"""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight(SINGLE_FLIGHT_PATH if SINGLE_FLIGHT == "on" else None)
+        return _single_flight
+
+
+def coalesce(satellite_name, data_type, fn):
+    """fn() run at most once at a time per (satellite_name, data_type), its result shared with concurrent callers"""
+    if SINGLE_FLIGHT == "off":
+        return fn()
+    return get_single_flight().run((satellite_name, data_type), fn)
@@ -0,0 +1,517 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import groupby
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class MemoryBackend:
+    """Keeps the whole database in a dict; subclasses decide how it is persisted"""
+
+    def __init__(self):
+        self.data = {}
+        # Writers from worker threads (parallel agents, batch runs) share one instance
+        self._lock = threading.RLock()
+        self._signature = None
+
+    def load(self):
+        self.data = {}
+
+    def _disk_signature(self):
+        """Something that changes whenever the files behind this backend change"""
+        return None
+
+    def _mark_synced(self):
+        self._signature = self._disk_signature()
+
+    def reload_if_changed(self):
+        """Reload if another process has written the files since we last read or wrote them"""
+        with self._lock:
+            if self._disk_signature() == self._signature:
+                return False
+            self.load()
+            return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def get(self, satellite_name):
+        return self.data.get(satellite_name)
+
+    def get_entry(self, satellite_name, data_type):
+        satellite_data = self.data.get(satellite_name)
+        if satellite_data is None:
+            return None
+        return satellite_data.get(data_type)
+
+    def names(self):
+        return list(self.data.keys())
+
+    def items(self):
+        """Iterate over (satellite_name, {data_type: entry}) pairs"""
+        with self._lock:
+            return iter([(name, dict(entries)) for name, entries in self.data.items()])
+
+    def records(self, data_type=None, updated_since=None):
+        """Iterate over (satellite_name, data_type, entry) rows, grouped by satellite.
+
+        Optionally only rows of one data type, or updated at or after the ISO
+        timestamp `updated_since`.
+        """
+        for satellite_name, satellite_data in self.items():
+            for dtype, entry in satellite_data.items():
+                if data_type and dtype != data_type:
+                    continue
+                if updated_since and (entry.get("last_updated") or "") < updated_since:
+                    continue
+                yield satellite_name, dtype, entry
+
+    def put(self, satellite_name, data_type, entry):
+        with self._lock:
+            self._apply_put(satellite_name, data_type, entry)
+            self._persist([("put", satellite_name, data_type, entry)])
+            self._mark_synced()
+
+    def put_many(self, records):
+        """Write several (satellite_name, data_type, entry) records in one commit"""
+        records = list(records)
+        with self._lock:
+            for satellite_name, data_type, entry in records:
+                self._apply_put(satellite_name, data_type, entry)
+            self._persist([("put",) + tuple(record) for record in records])
+            self._mark_synced()
+
+    def delete(self, satellite_name):
+        with self._lock:
+            if satellite_name not in self.data:
+                return False
+            del self.data[satellite_name]
+            self._persist([("delete", satellite_name, None, None)])
+            self._mark_synced()
+            return True
+
+    def _apply_put(self, satellite_name, data_type, entry):
+        self.data.setdefault(satellite_name, {})[data_type] = entry
+
+    def _persist(self, ops):
+        pass
+
+
+def _atomic_write_json(path, data, indent=None):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class JSONFileBackend(MemoryBackend):
+    """The original storage format: one pretty-printed JSON document rewritten on every write"""
+
+    def __init__(self, path="satellite_data.json"):
+        super().__init__()
+        self.path = path
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+        else:
+            self.data = {}
+        self._mark_synced()
+
+    def _disk_signature(self):
+        return _file_signature(self.path)
+
+    def flush(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.data, f, indent=4)
+        self._mark_synced()
+
+    def _persist(self, ops):
+        self.flush()
+
+
+class JournalBackend(MemoryBackend):
+    """Append-only record journal on top of a periodically compacted snapshot.
+
+    Every write or delete appends one JSON line to the journal, so a write costs
+    O(record) instead of O(database). Once the journal holds `compact_every`
+    operations it is folded into the snapshot. Replaying the journal is
+    idempotent, so a crash between writing the snapshot and truncating the
+    journal is harmless, and a torn last line from an interrupted append is
+    dropped on load.
+
+    Several processes may share the files: appends, loads and compactions
+    hold an exclusive lock on `<base>.lock`, and each first replays what the
+    other processes wrote since, so a compaction never drops their records.
+    """
+
+    def __init__(self, path="satellite_data.json", compact_every=1000, fsync=True):
+        super().__init__()
+        base, _ = os.path.splitext(path)
+        self.import_path = path
+        self.snapshot_path = f"{base}.snapshot.json"
+        self.journal_path = f"{base}.journal"
+        self.lock_path = f"{base}.lock"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.journal_ops = 0
+        self._journal = None
+        self._journal_offset = 0
+        self._snapshot_signature = None
+        self._lock_file = None
+        self._lock_depth = 0
+        self.load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes; re-entrant within this instance"""
+        with self._lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self.lock_path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        self._lock_file.seek(0)
+                        msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def load(self):
+        with self._file_lock():
+            self._close_journal()
+            self.data = {}
+            self.journal_ops = 0
+            self._journal_offset = 0
+
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, 'r') as f:
+                    self.data = json.load(f)
+            elif not os.path.exists(self.journal_path) and os.path.exists(self.import_path):
+                # First start on an existing JSON database: seed the snapshot from it
+                with open(self.import_path, 'r') as f:
+                    self.data = json.load(f)
+                _atomic_write_json(self.snapshot_path, self.data)
+            self._snapshot_signature = _file_signature(self.snapshot_path)
+
+            if os.path.exists(self.journal_path):
+                self._replay()
+
+    def _replay(self):
+        """Apply the journal from where this instance last stopped reading"""
+        valid_bytes = self._journal_offset
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(op)
+                self.journal_ops += 1
+                valid_bytes += len(line)
+        self._journal_offset = valid_bytes
+
+        if valid_bytes != os.path.getsize(self.journal_path):
+            # Appends hold the file lock, so with it held an incomplete line can only be torn
+            print(f"Discarding torn tail of {self.journal_path}")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    def _journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def _catch_up(self):
+        """Apply what other processes wrote since our last read or write; call with the file lock held.
+
+        Returns True if anything was read.
+        """
+        size = self._journal_size()
+        if _file_signature(self.snapshot_path) != self._snapshot_signature or size < self._journal_offset:
+            # Another process compacted: its snapshot holds records we may not have
+            self.load()
+            return True
+        if size > self._journal_offset:
+            self._replay()
+            return True
+        return False
+
+    def reload_if_changed(self):
+        with self._file_lock():
+            return self._catch_up()
+
+    def _apply(self, op):
+        if op["op"] == "put":
+            self._apply_put(op["satellite"], op["data_type"], op["entry"])
+        elif op["op"] == "delete":
+            self.data.pop(op["satellite"], None)
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'ab')
+        return self._journal
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _persist(self, ops):
+        records = []
+        for op, satellite_name, data_type, entry in ops:
+            record = {"op": op, "satellite": satellite_name}
+            if op == "put":
+                record["data_type"] = data_type
+                record["entry"] = entry
+            records.append(record)
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+        with self._file_lock():
+            self._catch_up()
+            # A reload above starts from disk, which does not have these ops yet
+            for record in records:
+                self._apply(record)
+            journal = self._open_journal()
+            journal.write(data)
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+            self._journal_offset += len(data)
+            self.journal_ops += len(records)
+
+            if self.journal_ops >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot and start an empty journal"""
+        with self._file_lock():
+            self._catch_up()
+            _atomic_write_json(self.snapshot_path, self.data)
+            self._snapshot_signature = _file_signature(self.snapshot_path)
+            self._close_journal()
+            open(self.journal_path, 'w').close()
+            self.journal_ops = 0
+            self._journal_offset = 0
+
+    def flush(self):
+        with self._lock:
+            if self.journal_ops:
+                self.compact()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._close_journal()
+
+
+class SQLiteBackend:
+    """One row per (satellite, data_type) in a WAL-mode SQLite database.
+
+    Nothing is cached in memory, so several processes can read and write the
+    same database; every write is a transactional upsert of just the affected
+    rows. Connections are per thread because sqlite3 connections cannot be
+    shared across threads.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS satellite_records (
+            satellite_name TEXT NOT NULL,
+            data_type TEXT NOT NULL,
+            last_updated TEXT,
+            entry TEXT NOT NULL,
+            PRIMARY KEY (satellite_name, data_type)
+        );
+        -- The primary key doubles as the index on satellite_name
+        CREATE INDEX IF NOT EXISTS idx_satellite_records_data_type
+            ON satellite_records (data_type);
+        CREATE INDEX IF NOT EXISTS idx_satellite_records_last_updated
+            ON satellite_records (last_updated);
+    """
+
+    def __init__(self, path="satellite_data.json", timeout=30.0):
+        base, ext = os.path.splitext(path)
+        self.import_path = path if ext == ".json" else None
+        self.db_path = path if ext in (".db", ".sqlite", ".sqlite3") else f"{base}.db"
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly in _transaction
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _transaction(self, statements):
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front so concurrent writers queue
+        # on busy_timeout instead of failing with a lock-upgrade deadlock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = None
+            for sql, params in statements:
+                cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+            return cursor
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def load(self):
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        empty = conn.execute("SELECT 1 FROM satellite_records LIMIT 1").fetchone() is None
+        if empty and self.import_path and os.path.exists(self.import_path):
+            with open(self.import_path, 'r') as f:
+                data = json.load(f)
+            self.put_many(
+                (satellite_name, data_type, entry)
+                for satellite_name, satellite_data in data.items()
+                for data_type, entry in satellite_data.items()
+            )
+
+    def flush(self):
+        pass
+
+    def reload_if_changed(self):
+        """True if another connection has committed since this thread's last check.
+
+        Every read goes to the database, so there is nothing to reload; the
+        answer only tells callers with derived caches to rebuild them.
+        """
+        version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+        changed = getattr(self._local, "data_version", version) != version
+        self._local.data_version = version
+        return changed
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def get(self, satellite_name):
+        rows = self._connect().execute(
+            "SELECT data_type, entry FROM satellite_records WHERE satellite_name = ? ORDER BY rowid",
+            (satellite_name,)
+        ).fetchall()
+        if not rows:
+            return None
+        return {data_type: json.loads(entry) for data_type, entry in rows}
+
+    def get_entry(self, satellite_name, data_type):
+        row = self._connect().execute(
+            "SELECT entry FROM satellite_records WHERE satellite_name = ? AND data_type = ?",
+            (satellite_name, data_type)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def names(self):
+        rows = self._connect().execute(
+            "SELECT satellite_name FROM satellite_records GROUP BY satellite_name ORDER BY MIN(rowid)"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def items(self):
+        rows = self.records()
+        for satellite_name, group in groupby(rows, key=lambda row: row[0]):
+            yield satellite_name, {data_type: entry for _, data_type, entry in group}
+
+    def records(self, data_type=None, updated_since=None):
+        conditions, params = [], []
+        if data_type:
+            conditions.append("data_type = ?")
+            params.append(data_type)
+        if updated_since:
+            conditions.append("last_updated >= ?")
+            params.append(updated_since)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        cursor = self._connect().execute(
+            "SELECT satellite_name, data_type, entry FROM satellite_records "
+            f"{where}ORDER BY satellite_name, rowid",
+            params
+        )
+        for satellite_name, dtype, entry in cursor:
+            yield satellite_name, dtype, json.loads(entry)
+
+    def put(self, satellite_name, data_type, entry):
+        self.put_many([(satellite_name, data_type, entry)])
+
+    def put_many(self, records):
+        """Upsert several (satellite_name, data_type, entry) records in one transaction"""
+        self._transaction(
+            (
+                "INSERT INTO satellite_records (satellite_name, data_type, last_updated, entry) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (satellite_name, data_type) DO UPDATE SET "
+                "last_updated = excluded.last_updated, entry = excluded.entry",
+                (satellite_name, data_type, entry.get("last_updated"), json.dumps(entry))
+            )
+            for satellite_name, data_type, entry in records
+        )
+
+    def delete(self, satellite_name):
+        cursor = self._transaction([
+            ("DELETE FROM satellite_records WHERE satellite_name = ?", (satellite_name,))
+        ])
+        return cursor.rowcount > 0
+
+
+BACKENDS = {
+    "json": JSONFileBackend,
+    "journal": JournalBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+def create_backend(name=None, path="satellite_data.json"):
+    """Create a storage backend by name (defaults to $SATELLITE_STORAGE_BACKEND or 'journal')"""
+    name = name or os.getenv("SATELLITE_STORAGE_BACKEND", "journal")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}. Choose from {', '.join(BACKENDS)}")
+    return BACKENDS[name](path)
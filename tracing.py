@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+# "jsonl" (default), "sqlite" or "off"
+TRACE_STORE = os.getenv("TRACE_STORE", "jsonl")
+TRACE_PATH = os.getenv("TRACE_PATH")
+DEFAULT_TRACE_PATHS = {"jsonl": "traces.jsonl", "sqlite": "traces.db"}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (0.0 when empty); shared by the reports of all modules"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Span:
+    """One timed operation: an agent run, LLM call, tool call, search or storage write"""
+
+    def __init__(self, kind, name, trace_id=None, parent_id=None, provider=None, **attrs):
+        self.kind = kind
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = trace_id or self.span_id
+        self.parent_id = parent_id
+        self.provider = provider
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration_ms = None
+        self.outcome = "ok"
+        self._started = time.monotonic()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, error=None):
+        self.duration_ms = (time.monotonic() - self._started) * 1000
+        if error is not None:
+            self.outcome = "error"
+            self.attrs["error"] = str(error)[:500]
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "provider": self.provider,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "outcome": self.outcome,
+            "attrs": self.attrs,
+        }
+
+
+class JSONLTraceStore:
+    """Appends one JSON line per finished span"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, span):
+        line = json.dumps(span, default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+
+    def read(self, since=None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or span["start"] >= since:
+                    yield span
+
+
+class SQLiteTraceStore:
+    """Keeps spans in a SQLite table, indexed for summaries over a time window"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            "span_id TEXT PRIMARY KEY, trace_id TEXT NOT NULL, parent_id TEXT, "
+            "kind TEXT NOT NULL, name TEXT, provider TEXT, start REAL NOT NULL, "
+            "duration_ms REAL, outcome TEXT, attrs TEXT)"
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_spans_start ON spans (start)")
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_spans_trace ON spans (trace_id)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def write(self, span):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (span["span_id"], span["trace_id"], span["parent_id"], span["kind"], span["name"],
+             span["provider"], span["start"], span["duration_ms"], span["outcome"],
+             json.dumps(span["attrs"], default=str))
+        )
+
+    def read(self, since=None):
+        rows = self._connect().execute(
+            "SELECT span_id, trace_id, parent_id, kind, name, provider, start, duration_ms, outcome, attrs "
+            "FROM spans WHERE start >= ? ORDER BY start",
+            (since or 0,)
+        )
+        for row in rows:
+            yield {
+                "span_id": row[0], "trace_id": row[1], "parent_id": row[2], "kind": row[3],
+                "name": row[4], "provider": row[5], "start": row[6], "duration_ms": row[7],
+                "outcome": row[8], "attrs": json.loads(row[9] or "{}"),
+            }
+
+
+def create_trace_store(name=None, path=None):
+    """Build the trace store named by TRACE_STORE, or None when tracing is off"""
+    name = name or TRACE_STORE
+    if name == "off":
+        return None
+    if name not in DEFAULT_TRACE_PATHS:
+        raise ValueError(f"Unknown trace store '{name}', expected one of: jsonl, sqlite, off")
+    path = path or TRACE_PATH or DEFAULT_TRACE_PATHS[name]
+    return SQLiteTraceStore(path) if name == "sqlite" else JSONLTraceStore(path)
+
+
+class Tracer:
+    """Records nested spans per thread and writes them to a trace store when they finish.
+
+    Spans opened on a thread are children of the span currently open on that
+    thread; work handed to a pool thread passes `parent` explicitly.
+    `annotate` adds attributes to the current span, which lets lower layers
+    (caches, the scheduler) report hits and queueing without knowing who
+    called them.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def start_span(self, kind, name, parent=None, provider=None, **attrs):
+        parent = parent or self.current()
+        span = Span(
+            kind, name,
+            trace_id=parent.trace_id if parent else None,
+            parent_id=parent.span_id if parent else None,
+            provider=provider,
+            **attrs
+        )
+        self._stack().append(span)
+        return span
+
+    def end_span(self, span, error=None):
+        span.finish(error)
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        if self.store is not None:
+            try:
+                self.store.write(span.to_dict())
+            except Exception as e:
+                print(f"Error writing trace span: {str(e)}")
+
+    @contextmanager
+    def span(self, kind, name, parent=None, provider=None, **attrs):
+        span = self.start_span(kind, name, parent=parent, provider=provider, **attrs)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        self.end_span(span)
+
+    def annotate(self, **attrs):
+        span = self.current()
+        if span is not None:
+            span.set(**attrs)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Return the process-wide tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(create_trace_store())
+        return _tracer
+
+
+def summarize(spans):
+    """Latency statistics per (kind, name), plus where each bot's run time went.
+
+    Returns (operations, bots): `operations` has count, errors, p50/p95/mean
+    in milliseconds and the cache hit rate where the span reported one;
+    `bots` has, per bot, the run latency and the mean time per run spent in
+    LLM calls and tool calls.
+    """
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    cache = defaultdict(lambda: [0, 0])
+    runs = {}
+    per_trace = defaultdict(lambda: defaultdict(float))
+
+    for span in spans:
+        if span.get("duration_ms") is None:
+            continue
+        key = (span["kind"], span["name"])
+        durations[key].append(span["duration_ms"])
+        if span.get("outcome") == "error":
+            errors[key] += 1
+        hit = span.get("attrs", {}).get("cache_hit")
+        if hit is not None:
+            cache[key][0] += bool(hit)
+            cache[key][1] += 1
+        if span["kind"] == "run" and not span.get("parent_id"):
+            runs[span["trace_id"]] = span
+        elif span["kind"] in ("llm", "tool"):
+            per_trace[span["trace_id"]][span["kind"]] += span["duration_ms"]
+
+    operations = []
+    for (kind, name), values in sorted(durations.items()):
+        hits, lookups = cache[(kind, name)]
+        operations.append({
+            "kind": kind,
+            "name": name,
+            "count": len(values),
+            "errors": errors[(kind, name)],
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "mean_ms": sum(values) / len(values),
+            "cache_hit_rate": hits / lookups if lookups else None,
+        })
+
+    by_bot = defaultdict(list)
+    for trace_id, run in runs.items():
+        by_bot[run["name"]].append((run["duration_ms"], per_trace[trace_id]))
+    bots = []
+    for name, items in sorted(by_bot.items()):
+        values = [duration for duration, _ in items]
+        bots.append({
+            "bot": name,
+            "runs": len(items),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "llm_ms_per_run": sum(parts["llm"] for _, parts in items) / len(items),
+            "tool_ms_per_run": sum(parts["tool"] for _, parts in items) / len(items),
+        })
+    return operations, bots
+
+
+def print_summary(operations, bots):
+    print(f"{'kind':<9}{'name':<32}{'count':>7}{'errors':>8}{'p50':>10}{'p95':>10}{'cache hits':>12}")
+    for op in operations:
+        hit_rate = f"{op['cache_hit_rate']:.0%}" if op["cache_hit_rate"] is not None else "-"
+        print(f"{op['kind']:<9}{str(op['name'])[:31]:<32}{op['count']:>7}{op['errors']:>8}"
+              f"{op['p50_ms'] / 1000:>9.2f}s{op['p95_ms'] / 1000:>9.2f}s{hit_rate:>12}")
+    if bots:
+        print(f"\n{'bot':<20}{'runs':>6}{'p50':>10}{'p95':>10}{'LLM/run':>10}{'tools/run':>11}")
+        for bot in bots:
+            print(f"{bot['bot']:<20}{bot['runs']:>6}{bot['p50_ms'] / 1000:>9.2f}s{bot['p95_ms'] / 1000:>9.2f}s"
+                  f"{bot['llm_ms_per_run'] / 1000:>9.2f}s{bot['tool_ms_per_run'] / 1000:>10.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize recorded agent traces")
+    parser.add_argument("--store", choices=["jsonl", "sqlite"], default=None, help="Trace store (default: TRACE_STORE)")
+    parser.add_argument("--path", help="Trace file (default: TRACE_PATH or traces.jsonl / traces.db)")
+    parser.add_argument("--hours", type=float, help="Only include spans from the last N hours")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    store = create_trace_store(args.store or (TRACE_STORE if TRACE_STORE != "off" else "jsonl"), args.path)
+    since = time.time() - args.hours * 3600 if args.hours else None
+    operations, bots = summarize(store.read(since))
+    if args.json:
+        print(json.dumps({"operations": operations, "bots": bots}, indent=2))
+    elif not operations:
+        print("No spans recorded")
+    else:
+        print_summary(operations, bots)
+
+
+if __name__ == "__main__":
+    main()
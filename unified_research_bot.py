@@ -0,0 +1,331 @@
+import copy
+import os
+from dotenv import load_dotenv
+from clients import get_chat_model, search_func, tavily_search_func
+from callbacks import invoke_agent
+from output_parsing import parse_output, OutputParseError
+from single_flight import coalesce
+from langchain.agents import create_react_agent, Tool
+from adaptive_executor import AdaptiveAgentExecutor
+from langchain.prompts import PromptTemplate
+from langchain_community.tools import DuckDuckGoSearchRun
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities import SerpAPIWrapper
+from data_manager import SatelliteDataManager
+from llm_cache import get_llm_cache
+from multi_search import MultiSearch, tavily_results, serpapi_results, duckduckgo_results
+from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+import basic_info_bot
+import technical_specs_bot
+import launch_cost_bot
+
+load_dotenv()
+
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
+
+# The three per-category schemas, reused as-is
+category_modules = {
+    "basic_info": basic_info_bot,
+    "technical_specs": technical_specs_bot,
+    "launch_cost_info": launch_cost_bot,
+}
+
+category_labels = {
+    "basic_info": "basic information",
+    "technical_specs": "technical specifications",
+    "launch_cost_info": "launch and cost information",
+}
+
+category_descriptions = {
+    "basic_info": "altitude, orbital life, orbit classification and number of payloads",
+    "technical_specs": "satellite type, application, sensor specifications and technological breakthroughs",
+    "launch_cost_info": "launch vehicle, date, site, mass, success, vehicle reusability and all cost components",
+}
+
+# Shape of the nested values, added to a category's keys in the Final Answer instructions
+category_notes = {
+    "basic_info": "",
+    "technical_specs": " The value of 'sensor_specs' is a JSON object with keys: spectral_bands, spatial_resolution.",
+    "launch_cost_info": (
+        " The value of 'launch_mass' is a JSON object with keys: max_leo, actual_mass."
+        " The value of 'mission_cost' is a JSON object with keys: overall_cost, vehicle_cost,"
+        " development_cost, approved_cost, operational_cost."
+    ),
+}
+
+
+def category_keys(data_type):
+    return ", ".join(schema.name for schema in category_modules[data_type].response_schemas)
+
+
+def category_fields(data_types):
+    """Schema fields of the given categories, in schema order"""
+    return [schema.name for data_type in data_types for schema in category_modules[data_type].response_schemas]
+
+
+def join_words(words):
+    return words[0] if len(words) == 1 else ", ".join(words[:-1]) + " and " + words[-1]
+
+
+response_schemas = [
+    ResponseSchema(
+        name=data_type,
+        type="object",
+        description=f"JSON object with keys: {category_keys(data_type)}"
+    )
+    for data_type in category_modules
+]
+
+output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+
+
+def category_parser(data_types):
+    """Output parser for the combined answer of the given categories"""
+    if list(data_types) == list(category_modules):
+        return output_parser
+    return StructuredOutputParser.from_response_schemas(
+        [schema for schema in response_schemas if schema.name in data_types]
+    )
+
+
+class UnifiedResearchBot:
+    """One ReAct agent that fills the basic_info, technical_specs and launch_cost_info
+    schemas, or the requested subset of them, from a single pass of searches.
+
+    Launch vehicle, mass, orbit and type usually come from the same few pages,
+    so one agent sharing its observations across categories needs far fewer
+    search and LLM calls than three separate bots.
+    """
+
+    data_types = list(category_modules)
+
+    def __init__(self, data_manager=None):
+        self.llm = get_chat_model(
+            model="gemini-1.5-flash",
+            google_api_key=GOOGLE_API_KEY,
+            temperature=0.7,
+            max_output_tokens=4098,
+            cache=get_llm_cache(),
+            # Retries are handled by the scheduler so they respect provider quotas
+            max_retries=1
+        )
+
+        self.data_manager = data_manager or SatelliteDataManager()
+        self.agent_executor = None
+
+    def get_tools(self):
+        search = TavilySearchResults(api_key=TAVILY_API_KEY)
+        serpapi = SerpAPIWrapper(serpapi_api_key=SERPAPI_API_KEY)
+        ddg = DuckDuckGoSearchRun()
+        multi_search = MultiSearch({
+            "tavily": tavily_results(search),
+            "serpapi": serpapi_results(serpapi),
+            "duckduckgo": duckduckgo_results(ddg.api_wrapper),
+        }).as_tool()
+
+        tavily_search = Tool(
+            name="tavily_search",
+            description="Search the web for satellite information",
+            func=tavily_search_func(search),
+            verbose=True
+        )
+
+        serpapi_search = Tool(
+            name="serpapi_search",
+            description="Search the web with SerpAPI for more comprehensive information",
+            func=search_func("serpapi", serpapi.run),
+            verbose=True
+        )
+
+        return [multi_search, tavily_search, serpapi_search]
+
+    def get_prompt_template(self):
+        template = """
+        You are a satellite researcher. Your task is to build a profile of the given satellite in one pass.
+
+        Available tools:
+        {tools}
+
+        Tools names:
+        {tool_names}
+
+        IMPORTANT GUIDELINES:
+        1. Collect these groups of information:
+{groups}
+        2. Each search result usually answers several groups at once (for example Wikipedia or
+           Gunter's Space Page list orbit, type, mass and launch vehicle together), so read every
+           observation for ALL fields before searching again
+        3. Search again only for fields that are still missing, with queries aimed at them
+        4. Include source URLs for each piece of information
+        5. Be precise with numerical values
+
+        CRITICAL INSTRUCTION:
+        You must follow the ReAct format for your responses:
+        Thought: (your reasoning about what to do next)
+        Action: (the tool to use, one of: {tool_names})
+        Action Input: (the input for the tool)
+        Observation: (the result of the action)
+        ... (this Thought/Action/Action Input/Observation can repeat N times)
+
+        When you have all the information, end with:
+        Thought: I now know the final answer
+        Final Answer: Respond in JSON with the keys {group_names}, each a JSON object with these keys:
+{answer_keys}
+
+        DO NOT WAIT FOR COMPLETE INFORMATION. Return whatever data you have gathered, even if some fields are missing.
+        Use "Not found" for any fields where you couldn't find information.
+
+        {format_instructions}
+
+        Question: {input}
+        {agent_scratchpad}
+        """
+
+        # The groups are filled per run, so a run for some categories never asks for the others
+        return PromptTemplate(
+            template=template,
+            input_variables=["input", "tools", "tool_names", "agent_scratchpad", "format_instructions",
+                             "groups", "group_names", "answer_keys"]
+        )
+
+    def group_variables(self, data_types):
+        """Prompt variables listing the categories a run has to fill"""
+        return {
+            "groups": "\n".join(
+                f"           - {data_type}: {category_descriptions[data_type]}" for data_type in data_types
+            ),
+            "group_names": join_words(list(data_types)),
+            "answer_keys": "\n".join(
+                f"        - {data_type}: {category_keys(data_type)}.{category_notes[data_type]}"
+                for data_type in data_types
+            ),
+        }
+
+    def split_output(self, parsed_output):
+        """Fill each category's schema from the combined answer, defaulting to "Not found" """
+        results = {}
+        for data_type, module in category_modules.items():
+            data = copy.deepcopy(module.not_found_output)
+            section = parsed_output.get(data_type) if isinstance(parsed_output, dict) else None
+            if isinstance(section, dict):
+                data.update({key: value for key, value in section.items() if key in data})
+            results[data_type] = data
+        return results
+
+    def get_agent_executor(self):
+        """Build the tools, prompt and agent executor once; they hold no per-run state"""
+        if self.agent_executor is None:
+            tools = self.get_tools()
+            prompt = self.get_prompt_template()
+
+            agent = create_react_agent(
+                self.llm,
+                tools,
+                prompt
+            )
+
+            # One agent replaces three 8-step runs, so it gets a larger cap than each;
+            # it stops early once the observations cover all three categories' fields
+            self.agent_executor = AdaptiveAgentExecutor(
+                agent=agent,
+                tools=tools,
+                verbose=True,
+                handle_parsing_errors=True,
+                max_iterations=12,
+                schema_fields=category_fields(category_modules),
+                early_stopping_method="force"
+            )
+        return self.agent_executor
+
+    def run_agent(self, question, format_instructions, callbacks=None, fields=None, data_types=None):
+        """Run the ReAct agent on a question and return its raw final answer.
+
+        `data_types` limits the categories the prompt asks for (default: all).
+        """
+        agent_executor = self.get_agent_executor()
+        tools = agent_executor.tools
+
+        # Create input dictionary with all expected variables
+        input_dict = {
+            "input": question,
+            "tools": tools,
+            "tool_names": [tool.name for tool in tools],
+            "agent_scratchpad": "",
+            "format_instructions": format_instructions,
+            # Schema keys this run has to fill when it is narrower than the bot's schema
+            "schema_fields": fields or []
+        }
+        input_dict.update(self.group_variables(data_types or list(category_modules)))
+
+        result = invoke_agent(agent_executor, input_dict, "unified", callbacks)
+        return result["output"]
+
+    def process_satellite(self, satellite_name, save=True, data_types=None, callbacks=None):
+        """Process a satellite and store the requested categories (default: all) with one commit.
+
+        The run holds the single-flight key of each category, the same
+        (satellite, data type) keys the per-category bots use (see
+        single_flight.py): a category another run is already researching
+        is taken from that run, and callers waiting for one of ours get it
+        from this run. Keys are taken in schema order, so two runs never
+        wait on each other.
+        """
+        data_types = [data_type for data_type in self.data_types if data_type in (data_types or self.data_types)]
+        results = {}
+
+        def hold(index):
+            if index == len(data_types):
+                pending = [data_type for data_type in data_types if data_type not in results]
+                if pending:
+                    results.update(self._process_satellite(satellite_name, save, pending, callbacks) or {})
+                return
+            data_type = data_types[index]
+            led = []
+
+            def lead():
+                led.append(True)
+                hold(index + 1)
+                return results.get(data_type)
+
+            shared = coalesce(satellite_name, data_type, lead)
+            if not led:
+                # Another run researched this category; research the rest ourselves
+                if shared is not None:
+                    results[data_type] = shared
+                hold(index + 1)
+
+        hold(0)
+        return results or None
+
+    def _process_satellite(self, satellite_name, save, data_types, callbacks):
+        try:
+            parser = category_parser(data_types)
+            output = self.run_agent(
+                f"Find {join_words([category_labels[data_type] for data_type in data_types])} for {satellite_name}",
+                parser.get_format_instructions(),
+                callbacks,
+                fields=category_fields(data_types),
+                data_types=data_types
+            )
+            try:
+                parsed_output = parse_output(output, parser, "unified", llm=self.llm)
+            except OutputParseError as parse_error:
+                print(f"Error parsing output: {str(parse_error)}")
+                print("Raw output:", output)
+                parsed_output = {}
+
+            results = {
+                data_type: data
+                for data_type, data in self.split_output(parsed_output).items()
+                if data_type in data_types
+            }
+            if save:
+                self.data_manager.append_many_satellite_data(
+                    (satellite_name, data_type, data) for data_type, data in results.items()
+                )
+            return results
+        except Exception as e:
+            print(f"Error processing satellite {satellite_name}: {str(e)}")
+            return None